@@ -0,0 +1,83 @@
+"""
+Benchmark of fetch() against a local in-process HTTP server.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from promise import Promise
+
+BODY = b'{"ok": true}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+	protocol_version = "HTTP/1.1" #-> keep-alive
+	disable_nagle_algorithm = True
+
+	def do_GET(self):
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(BODY)))
+		self.end_headers()
+		self.wfile.write(BODY)
+
+	def log_message(self, *args):
+		pass
+
+
+def serve() -> ThreadingHTTPServer:
+	"""
+	Returns
+	-------
+		A started HTTP server bound to an ephemeral port of 127.0.0.1, 
+		to be closed with shutdown().
+	"""
+
+	server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+	server.daemon_threads = True
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+
+	return server
+
+
+def throughput(count: int = 2_000) -> List[dict]:
+	"""
+	fetch() calls completed per second.
+	"""
+
+	try:
+		from fetch.fetch import fetch
+	except ImportError as error:
+		return [{"name": "fetch.throughput", "params": {"count": count}, "skipped": str(error)}]
+
+	server = serve()
+	url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+	try:
+		settled = threading.Event()
+		outcome = {}
+
+		start = time.perf_counter()
+
+		Promise.all([fetch(url) for _ in range(count)]).then(
+			lambda _: settled.set(),
+			lambda reason: (outcome.setdefault("error", repr(reason)), settled.set())
+		)
+
+		settled.wait()
+		elapsed = time.perf_counter() - start
+
+	finally:
+		server.shutdown()
+		server.server_close()
+
+	if "error" in outcome:
+		return [{"name": "fetch.throughput", "params": {"count": count}, "error": outcome["error"]}]
+
+	return [{"name": "fetch.throughput", "params": {"count": count}, "unit": "requests/s", "value": count / elapsed}]
+
+
+def run(quick: bool = False) -> List[dict]:
+	return throughput(200 if quick else 2_000)
@@ -0,0 +1,74 @@
+"""
+Memory benchmark: bytes retained per live Promise.
+
+Run from the repository root:
+
+	python -m benchmarks.memory [count]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from promise import Promise
+
+
+def bytes_per_promise(factory: Callable[[], Promise], count: int) -> float:
+	"""
+	Parameters
+	----------
+	factory : Callable[[], Promise]
+		A function creating one Promise.
+
+	count : int
+		The number of promises kept alive during the measure.
+
+	Returns
+	-------
+		The average number of bytes retained per Promise.
+	"""
+
+	keep = [None] * count #-> preallocated so the list is not measured
+
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+
+	for index in range(count):
+		keep[index] = factory()
+
+	# let the executors run and settle their promises
+	time.sleep(0.5)
+
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+
+	retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+	return retained / count
+
+
+def pending_with_subscriber() -> Promise:
+	promise = Promise()
+	promise.then(lambda value: value) #-> the child is kept alive by the reaction
+	return promise
+
+
+CASES = {
+	"Promise.resolve(value)": lambda: Promise.resolve(1),
+	"Promise.reject(reason)": lambda: Promise.reject(1),
+	"Promise() pending": lambda: Promise(),
+	"Promise(executor) settled": lambda: Promise(lambda resolve, _: resolve(1)),
+	"Promise() pending + then()": pending_with_subscriber,
+}
+
+
+def run(count: int = 100_000) -> dict:
+	return { name: bytes_per_promise(factory, count) for name, factory in CASES.items() }
+
+
+if __name__ == "__main__":
+
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+	for name, size in run(count).items():
+		print(f"{name:<32} {size:8.1f} bytes/promise")
@@ -0,0 +1,117 @@
+"""
+Benchmarks of the promise runtime: creation throughput, settle-to-handler
+latency, chain depth scaling and Promise.all fan-out.
+"""
+import statistics
+import threading
+import time
+from typing import List
+
+from promise import Promise
+
+
+def _wait(promise: Promise) -> None:
+	settled = threading.Event()
+	promise.then(lambda _: settled.set(), lambda _: settled.set())
+	settled.wait()
+
+
+def creation(count: int = 100_000) -> List[dict]:
+	"""
+	Promises created, run and settled per second.
+	"""
+
+	start = time.perf_counter()
+	promises = [Promise(lambda resolve, _: resolve(None)) for _ in range(count)]
+	_wait(Promise.all(promises))
+	executed = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for _ in range(count): Promise.resolve(None)
+	presettled = time.perf_counter() - start
+
+	return [
+		{"name": "creation.executor", "params": {"count": count}, "unit": "promises/s", "value": count / executed},
+		{"name": "creation.resolve", "params": {"count": count}, "unit": "promises/s", "value": count / presettled},
+	]
+
+
+def latency(samples: int = 2_000) -> List[dict]:
+	"""
+	Time between the call to resolve and the start of the handler.
+	"""
+
+	timings = []
+
+	for _ in range(samples):
+		box = {}
+		promise = Promise(lambda resolve, _: box.setdefault("resolve", resolve))
+
+		settled = threading.Event()
+		promise.then(lambda _: (box.setdefault("handled", time.perf_counter()), settled.set()))
+
+		while "resolve" not in box: time.sleep(0)
+
+		start = time.perf_counter()
+		box["resolve"](None)
+		settled.wait()
+
+		timings.append((box["handled"] - start) * 1e6)
+
+	timings.sort()
+
+	return [
+		{"name": "latency.settle_to_handler.p50", "params": {"samples": samples}, "unit": "us", "value": statistics.median(timings)},
+		{"name": "latency.settle_to_handler.p99", "params": {"samples": samples}, "unit": "us", "value": timings[int(len(timings) * 0.99) - 1]},
+	]
+
+
+def chain(depths: tuple = (10, 1_000, 100_000)) -> List[dict]:
+	"""
+	Time for a value to travel through a chain of then() of a given depth.
+	"""
+
+	results = []
+
+	for depth in depths:
+		box = {}
+		root = Promise(lambda resolve, _: box.setdefault("resolve", resolve))
+
+		tail = root
+		for _ in range(depth): tail = tail.then(lambda value: value + 1)
+
+		while "resolve" not in box: time.sleep(0)
+
+		start = time.perf_counter()
+		box["resolve"](0)
+		_wait(tail)
+		elapsed = time.perf_counter() - start
+
+		results.append({"name": "chain.depth", "params": {"depth": depth}, "unit": "us/link", "value": elapsed / depth * 1e6})
+
+	return results
+
+
+def fan_out(sizes: tuple = (10, 1_000, 100_000)) -> List[dict]:
+	"""
+	Time for Promise.all to settle over a given number of inputs.
+	"""
+
+	results = []
+
+	for size in sizes:
+		start = time.perf_counter()
+		_wait(Promise.all([Promise(lambda resolve, _: resolve(1)) for _ in range(size)]))
+		elapsed = time.perf_counter() - start
+
+		results.append({"name": "all.fan_out", "params": {"inputs": size}, "unit": "s", "value": elapsed})
+
+	return results
+
+
+def run(quick: bool = False) -> List[dict]:
+
+	if quick:
+		return creation(10_000) + latency(200) + chain((10, 1_000, 10_000)) + fan_out((10, 1_000, 10_000))
+
+	return creation() + latency() + chain() + fan_out()
@@ -0,0 +1,57 @@
+"""
+Run the whole benchmark suite and write the results as JSON.
+
+	python -m benchmarks.run [--quick] [--output results.json]
+
+Every result is an object with a name, its params, a unit and a value; a 
+benchmark that could not run has a "skipped" or an "error" entry instead 
+of a value.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import fetch_throughput, memory, promise_runtime
+
+
+def main(argv: list|None = None) -> int:
+
+	parser = argparse.ArgumentParser(description="promise and fetch benchmarks")
+	parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke run")
+	parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+	args = parser.parse_args(argv)
+
+	results = promise_runtime.run(args.quick)
+	results += fetch_throughput.run(args.quick)
+	results += [
+		{"name": "memory.bytes_per_promise", "params": {"case": case}, "unit": "bytes", "value": size}
+		for case, size in memory.run(10_000 if args.quick else 100_000).items()
+	]
+
+	report = {
+		"meta": {
+			"timestamp": time.time(),
+			"python": platform.python_version(),
+			"implementation": platform.python_implementation(),
+			"platform": platform.platform(),
+			"cpu_count": os.cpu_count(),
+			"quick": args.quick,
+		},
+		"results": results,
+	}
+
+	output = json.dumps(report, indent=2)
+
+	if args.output:
+		with open(args.output, "w") as file: file.write(output + "\n")
+	else:
+		print(output)
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,4 +1,3 @@
-from line_profiler import LineProfiler
 import requests
 from promise import Promise
 
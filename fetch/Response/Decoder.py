@@ -0,0 +1,269 @@
+import zlib
+from typing import Any, Callable, Iterator, List
+
+import requests
+
+# the content codings decoded by ContentDecoder, sent as Accept-Encoding
+ACCEPT_ENCODING = "gzip, deflate"
+
+_CODINGS = frozenset(("gzip", "x-gzip", "deflate", "identity"))
+
+
+class DecompressionBombError(requests.exceptions.ContentDecodingError):
+	"""
+	Raised when a compressed body decodes to more bytes, or at a higher
+	compression ratio, than a ContentDecoder allows.
+	"""
+
+
+class _Stage:
+	"""
+	The decompressor of one content coding. A deflate body is zlib-wrapped
+	(RFC 9110) but some servers send it raw: the first two bytes tell.
+	"""
+
+	__slots__ = ("gzip", "inflater", "head", "members")
+
+	def __init__(self, gzip: bool):
+		self.gzip = gzip
+		self.inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip else None
+		self.head = b"" #-> input kept for the next call
+		self.members = 0 #-> gzip members decoded
+
+	def decompress(self, data: Any, max_length: int) -> bytes:
+
+		if self.inflater is None:
+			data = self.head + bytes(data)
+			self.head = b""
+
+			if len(data) < 2:
+				self.head = data
+				return b""
+
+			wrapped = data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0
+			self.inflater = zlib.decompressobj(zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS)
+
+		try:
+			output = self.inflater.decompress(data, max_length)
+		except zlib.error:
+			# as urllib3, what follows a complete gzip member may be garbage
+			if self.members: return b""
+			raise
+
+		# a gzip body can be made of several members
+		if self.gzip and self.inflater.eof:
+			self.members += 1
+			self.head = self.inflater.unused_data
+			self.inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+		return output
+
+	def tail(self) -> bytes:
+		# the input left to decompress: a bounded output leaves some behind
+		if self.inflater is None: return b""
+
+		tail = self.head or self.inflater.unconsumed_tail
+		self.head = b""
+
+		return tail
+
+	def flush(self) -> bytes:
+		return self.inflater.flush() if self.inflater is not None else b""
+
+
+class ContentDecoder:
+	"""
+	An incremental decoder of a Content-Encoding: the body is decompressed
+	chunk by chunk as it is read, every output chunk being at most chunk_size
+	bytes, so that a compressed body is never held in memory in full.
+
+	A decompression bomb is stopped as soon as the decoded size goes over
+	MAX_SIZE, or once past RATIO_THRESHOLD bytes, when it is more than
+	MAX_RATIO times the compressed size. These limits are class attributes,
+	to be changed for every Response or in a subclass.
+	"""
+
+	MAX_SIZE: int|None = None
+	MAX_RATIO: float|None = 200.0
+	RATIO_THRESHOLD = 1024 * 1024
+
+	def __init__(self, encoding: str):
+		"""
+		Args:
+			encoding: The Content-Encoding header, e.g. 'gzip', the codings
+				in the order they were applied.
+
+		Raises:
+			ValueError: If a coding is not supported, see supports().
+		"""
+
+		codings = [coding.strip().lower() for coding in encoding.split(",") if coding.strip()]
+
+		if not all(coding in _CODINGS for coding in codings):
+			raise ValueError(f"Unsupported content encoding {encoding!r}")
+
+		# the last coding applied is the first removed
+		self.__stages: List[_Stage] = [_Stage(coding != "deflate") for coding in reversed(codings) if coding != "identity"]
+
+		self.consumed = 0 #-> compressed bytes
+		self.produced = 0 #-> decoded bytes
+
+	@staticmethod
+	def supports(encoding: str|None) -> bool:
+		"""Returns: True if every coding of a Content-Encoding can be decoded."""
+
+		if not encoding: return True
+		return all(coding.strip().lower() in _CODINGS for coding in encoding.split(",") if coding.strip())
+
+	def __check(self) -> None:
+
+		if self.MAX_SIZE is not None and self.produced > self.MAX_SIZE:
+			raise DecompressionBombError(f"The decoded body is larger than {self.MAX_SIZE} bytes")
+
+		if self.MAX_RATIO is not None and self.produced > self.RATIO_THRESHOLD and self.produced > self.MAX_RATIO * self.consumed:
+			raise DecompressionBombError(f"The body decodes {self.produced // max(1, self.consumed)} times larger than its {self.consumed} compressed bytes")
+
+	def __feed(self, index: int, data: Any, chunk_size: int) -> Iterator[bytes]:
+
+		if index == len(self.__stages):
+			if data: yield data
+			return
+
+		stage = self.__stages[index]
+
+		try:
+			while data:
+				output = stage.decompress(data, chunk_size)
+				data = stage.tail()
+
+				if output: yield from self.__feed(index + 1, output, chunk_size)
+		except zlib.error as error:
+			raise requests.exceptions.ContentDecodingError(f"Failed to decode the body: {error}") from error
+
+	def decode(self, data: Any, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+		"""
+		Args:
+			data: The next bytes-like chunk of the encoded body.
+			chunk_size: The maximum size of the decoded chunks.
+
+		Returns:
+			An iterator of the decoded chunks. A DecompressionBombError is
+			raised, before the chunk over the limits is yielded, if the body
+			decodes too large.
+		"""
+
+		self.consumed += len(data)
+
+		for chunk in self.__feed(0, data, chunk_size):
+			self.produced += len(chunk)
+			self.__check()
+			yield chunk
+
+	def flush(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+		"""
+		Returns:
+			An iterator of the decoded chunks still buffered by the
+			decompressors, once the whole body has been decoded.
+		"""
+
+		for index, stage in enumerate(self.__stages):
+			try:
+				rest = stage.flush()
+			except zlib.error as error:
+				raise requests.exceptions.ContentDecodingError(f"Failed to decode the body: {error}") from error
+
+			for chunk in self.__feed(index + 1, rest, chunk_size):
+				self.produced += len(chunk)
+				self.__check()
+				yield chunk
+
+
+def decode_stream(raw: Any, encoding: str|None, chunk_size: int) -> Iterator[memoryview]:
+	"""
+	Read and decode the body of a urllib3 response, which must not decode it.
+
+	Args:
+		raw: The urllib3 response, e.g. requests.Response.raw.
+		encoding: The Content-Encoding of the response.
+		chunk_size: The size of the reusable read buffer.
+
+	Returns:
+		An iterator of memoryview chunks. Without content coding, every
+		chunk is a view of a buffer overwritten by the next read.
+	"""
+
+	if not ContentDecoder.supports(encoding):
+		# e.g. br, when asked for with an Accept-Encoding header: left to urllib3
+		for chunk in raw.stream(chunk_size, decode_content=True): yield memoryview(chunk)
+		return
+
+	decoder = ContentDecoder(encoding) if encoding and encoding.strip().lower() != "identity" else None
+
+	buffer = bytearray(chunk_size)
+	view = memoryview(buffer)
+
+	while True:
+		read = raw.readinto(buffer)
+		if not read: break
+
+		if decoder is None:
+			yield view[:read]
+		else:
+			for chunk in decoder.decode(view[:read], chunk_size): yield memoryview(chunk)
+
+	if decoder is not None:
+		for chunk in decoder.flush(chunk_size): yield memoryview(chunk)
+
+
+def tee(response: requests.Response, sink: Callable[[memoryview|None], None]) -> None:
+	"""
+	Copy the decoded body of a streamed requests.Response to sink as it is
+	read, by iter_content() or read_content(): sink(chunk) for every chunk,
+	then sink(None) once the whole body has been read. A read stopped
+	early, by an error or by closing the response, never calls sink(None).
+
+	The chunks are views of a reused buffer: sink must copy them.
+	"""
+	response._body_sink = sink
+
+
+def iter_content(response: requests.Response, chunk_size: int) -> Iterator[memoryview]:
+	"""
+	Read and decode the body of a streamed requests.Response, see
+	decode_stream(), feeding its tee() sink if any.
+	"""
+
+	sink = getattr(response, "_body_sink", None)
+
+	if sink is None:
+		yield from decode_stream(response.raw, response.headers.get("content-encoding"), chunk_size)
+		return
+
+	for chunk in decode_stream(response.raw, response.headers.get("content-encoding"), chunk_size):
+		sink(chunk)
+		yield chunk
+
+	sink(None)
+
+
+def read_content(response: requests.Response, chunk_size: int = 64 * 1024) -> bytes:
+	"""
+	Read the whole body of a streamed requests.Response like its content
+	property, but decoded by a ContentDecoder, with its limits.
+
+	Returns:
+		The decoded body, also stored as the content of the response.
+	"""
+
+	if response._content is False:
+		if response.raw is None:
+			response._content = b""
+		else:
+			buffer = bytearray()
+			for chunk in iter_content(response, chunk_size): buffer += chunk
+
+			response._content = bytes(buffer)
+
+		response._content_consumed = True #-> read to the end: its connection is released
+
+	return response._content
@@ -1,12 +1,136 @@
 # https://developer.mozilla.org/en-US/docs/Web/API/Headers/delete
 # https://developer.mozilla.org/en-US/docs/Glossary/Forbidden_header_name
 # https://developer.mozilla.org/en-US/docs/Glossary/Forbidden_response_header_name
-import re
-from typing import Callable
+import sys
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Tuple
+
+from requests.utils import parse_header_links
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-5.6.2
+_TCHARS = "!#$%&'*+-.^_`|~0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# every distinct name is validated once: name as given -> interned lowercase name
+_NAMES: Dict[str, str] = {}
+_NAMES_MAX = 4096 #-> names come from the network, the memo must stay bounded
+
+def _normalize_name(name: str, method: str) -> str:
+
+	normalized = _NAMES.get(name)
+	if normalized is not None: return normalized
+
+	# a name is a token: stripping every token character leaves nothing
+	if not isinstance(name, str) or not name or name.strip(_TCHARS):
+		raise TypeError(f"Failed to execute '{method}' on 'Headers': Invalid name")
+
+	normalized = sys.intern(name.lower())
+	if len(_NAMES) < _NAMES_MAX: _NAMES[name] = normalized
+
+	return normalized
+
+
+#>> structured values of the headers, immutable as they are shared by every reader
+
+class ContentType(NamedTuple):
+	type: str #-> lowercase, e.g. 'text/html'
+	params: Mapping[str, str] #-> lowercase names, e.g. {'charset': 'utf-8'}
+
+	@property
+	def charset(self) -> str|None:
+		return self.params.get("charset")
+
+class ETag(NamedTuple):
+	tag: str #-> without quotes
+	weak: bool
+
+class Link(NamedTuple):
+	url: str
+	params: Mapping[str, str] #-> e.g. {'rel': 'next'}
+
+	@property
+	def rel(self) -> str|None:
+		return self.params.get("rel")
+
+
+def _parse_params(value: str) -> Tuple[str, Dict[str, str]]:
+	first, *parts = value.split(";")
+	params = {}
+
+	for part in parts:
+		name, _, argument = part.partition("=")
+		name = name.strip().lower()
+		if name: params[name] = argument.strip().strip('"')
+
+	return first.strip(), params
+
+def _parse_content_type(value: str) -> ContentType:
+	mime, params = _parse_params(value)
+	return ContentType(mime.lower(), MappingProxyType(params))
+
+def _parse_content_length(value: str) -> int|None:
+	# repeated identical values are allowed (RFC 9110 8.6)
+	lengths = { length.strip() for length in value.split(",") }
+	if len(lengths) != 1: return None
+
+	# isdigit() accepts e.g. '²', which int() rejects
+	length = lengths.pop()
+	return int(length) if length.isascii() and length.isdecimal() else None
+
+def parse_cache_control(value: str|None) -> Dict[str, str|None]:
+	"""Parse a Cache-Control header.
+
+	Args:
+		value: The header value, e.g. 'public, max-age=60'.
+
+	Returns:
+		A dict of lowercase directive names to their value, None for
+		directives without value.
+	"""
+
+	directives = {}
+
+	if not value: return directives
+
+	for directive in value.split(","):
+		name, _, argument = directive.strip().partition("=")
+		if name: directives[name.lower()] = argument.strip().strip('"') if argument else None
+
+	return directives
+
+def _parse_cache_control(value: str) -> Mapping[str, str|None]:
+	return MappingProxyType(parse_cache_control(value))
+
+def _parse_etag(value: str) -> ETag:
+	value = value.strip()
+	weak = value.startswith("W/")
+	return ETag((value[2:] if weak else value).strip('"'), weak)
+
+def _parse_last_modified(value: str) -> datetime|None:
+	try:
+		return parsedate_to_datetime(value)
+	except (TypeError, ValueError):
+		return None
+
+def _parse_vary(value: str) -> Tuple[str, ...]:
+	return tuple(name.strip().lower() for name in value.split(",") if name.strip())
+
+def _parse_links(value: str) -> Tuple[Link, ...]:
+	links = []
+
+	for link in parse_header_links(value):
+		url = link.pop("url")
+		links.append(Link(url, MappingProxyType(link)))
+
+	return tuple(links)
+
+_MISSING = object()
+
 
 class Headers:
 
-	def __init__(self, init: dict = {}):
+	def __init__(self, init: 'dict|Iterable[Tuple[str, str]]|Headers' = {}):
 		"""
 		The Headers() constructor creates a new Headers object.
 
@@ -21,21 +145,79 @@ class Headers:
 			its data from the existing Headers object.
 		"""
 
-		self.__headers = self.__parse_init(init)
+		# lowercase name: values, in the order they were added; they are 
+		# only joined when read, and Set-Cookie values never are
+		self.__headers: Dict[str, List[str]] = self.__parse_init(init)
 
+		# lowercase name: its parsed value, see the structured views; an 
+		# entry is dropped whenever its header changes
+		self.__parsed: Dict[str, Any] = {}
 
-	def __parse_init(self, init: dict):
+
+	def __parse_init(self, init) -> Dict[str, List[str]]:
+
+		if isinstance(init, Headers):
+			return { name: list(values) for name, values in init.__headers.items() }
 
 		headers = {}
 
-		for name, value in init.items():
+		# a mapping, e.g. the HTTPHeaderDict of urllib3 whose items() 
+		# yields repeated headers one by one, or a sequence of pairs
+		for name, value in (init.items() if hasattr(init, "items") else init):
 
-			name = name.lower()
+			name = _normalize_name(name, "constructor")
+			values = headers.get(name)
 
-			if name in headers: 
-				headers[name] = f"{headers[name]}, {value}"
-			else: 
-				headers[name] = value
+			if values is None: headers[name] = [value]
+			else: values.append(value)
+
+		return headers
+
+	@staticmethod
+	def from_raw(raw: bytes) -> 'Headers':
+		"""
+		Parse a raw HTTP header block in one pass.
+
+		Parameters
+		----------
+		raw : bytes
+			The header lines, separated by CRLF or LF, optionally preceded 
+			by the status line and followed by the empty line ending the 
+			block. Folded lines (obs-fold) are unfolded.
+
+		Returns
+		-------
+			A new Headers object.
+		"""
+
+		headers = Headers()
+		store = headers.__headers
+
+		last = None #-> the values of the previous line, for folded lines
+
+		for line in bytes(raw).decode("latin-1").split("\n"):
+
+			if line.endswith("\r"): line = line[:-1]
+
+			if not line:
+				if last is None: continue #-> before the first header
+				break #-> end of the block
+
+			if line[0] in " \t":
+				if last is not None: last[-1] = last[-1] + " " + line.strip(" \t")
+				continue
+
+			name, colon, value = line.partition(":")
+
+			if not colon: continue #-> the status line, or garbage
+
+			name = _normalize_name(name, "from_raw")
+			values = store.get(name)
+
+			if values is None: values = store[name] = []
+			values.append(value.strip(" \t"))
+
+			last = values
 
 		return headers
 
@@ -47,25 +229,18 @@ class Headers:
 	#* ██████╔╝███████╗╚██████╗╚██████╔╝██║  ██║██║  ██║   ██║   ╚██████╔╝██║  ██║███████║
 	#* ╚═════╝ ╚══════╝ ╚═════╝ ╚═════╝ ╚═╝  ╚═╝╚═╝  ╚═╝   ╚═╝    ╚═════╝ ╚═╝  ╚═╝╚══════╝
 
-	def __check_http_header_name(func: Callable) -> bool:
+	def __check_http_header_name(func: Callable) -> Callable:
 		"""
 		The __check_http_header_name() method of the Headers interface 
-		checks if a header name is valid.
+		checks if a header name is valid, and passes it lowercased.
 
-		for validation follow: https://developers.cloudflare.com/rules/transform/request-header-modification/reference/header-format/
+		for validation follow: https://www.rfc-editor.org/rfc/rfc9110#section-5.6.2
 		"""
 
-		def inner(self, *args):
+		method = func.__name__
 
-			args = list(args)
-			name = args[0].lower()
-
-			if re.match('^[a-zA-Z0-9_-]+$', name):
-
-				args[0] = name
-				return func(self, *args)
-			else:
-				raise TypeError(f"Failed to execute '{func.__name__}' on 'Headers': Invalid name")
+		def inner(self, name: str, *args):
+			return func(self, _normalize_name(name, method), *args)
 		
 		return inner
                          
@@ -101,6 +276,25 @@ class Headers:
 		"""
 		return self.set(name, value)
 
+	def __iter__(self) -> Iterator[Tuple[str, str]]:
+		"""
+		Magic method that call "entries" method.
+		"""
+		return self.entries()
+
+	def __view(self, name: str, parse: Callable[[str], Any]) -> Any:
+
+		parsed = self.__parsed.get(name, _MISSING)
+		if parsed is not _MISSING: return parsed
+
+		values = self.__headers.get(name)
+
+		if values is None: parsed = None
+		else: parsed = parse(values[0] if len(values) == 1 else ", ".join(values))
+
+		self.__parsed[name] = parsed
+		return parsed
+
 	#* ██╗████████╗███████╗██████╗ 
 	#* ██║╚══██╔══╝██╔════╝██╔══██╗
 	#* ██║   ██║   █████╗  ██████╔╝
@@ -108,37 +302,111 @@ class Headers:
 	#* ██║   ██║   ███████╗██║  ██║
 	#* ╚═╝   ╚═╝   ╚══════╝╚═╝  ╚═╝
 
-	def entries(self) -> iter:
+	def entries(self) -> Iterator[Tuple[str, str]]:
 		"""
 		The Headers.entries() method returns an iterator allowing 
 		to go through all key/value pairs contained in this object. 
 		The both the key and value of each pairs are String objects.
+		Every Set-Cookie value is a pair of its own.
 		"""
-		return iter(self.__headers.items())
 
-	def keys(self) -> iter:
+		for name, values in self.__headers.items():
+
+			if name == "set-cookie":
+				for value in values: yield name, value
+
+			elif len(values) == 1: yield name, values[0]
+			else: yield name, ", ".join(values)
+
+	def keys(self) -> Iterator[str]:
 		"""
 		The Headers.keys() method returns an iterator allowing to go through 
 		all keys contained in this object. The keys are String objects.
 		"""
 
-		return iter(self.__headers.keys())
+		return (name for name, _ in self.entries())
 
-	def values(self) -> iter:
+	def values(self) -> Iterator[str]:
 		"""
 		The Headers.values() method returns an iterator allowing to go 
 		through all values contained in this object. The values are String 
 		objects.
 		"""
 
-		return iter(self.__headers.values())
+		return (value for _, value in self.entries())
 								
 	def forEach(self, callback: Callable[[str, str], None]) -> None:
 		"""
 		The Headers.forEach() method executes a callback function once 
-		per each key/value pair in the Headers object.
+		per each key/value pair in the Headers object, with the value 
+		and the name.
 		"""
 
+		for name, value in self.entries(): callback(value, name)
+
+
+	#* ██╗   ██╗██╗███████╗██╗    ██╗███████╗
+	#* ██║   ██║██║██╔════╝██║    ██║██╔════╝
+	#* ██║   ██║██║█████╗  ██║ █╗ ██║███████╗
+	#* ╚██╗ ██╔╝██║██╔══╝  ██║███╗██║╚════██║
+	#*  ╚████╔╝ ██║███████╗╚███╔███╔╝███████║
+	#*   ╚═══╝  ╚═╝╚══════╝ ╚══╝╚══╝ ╚══════╝
+
+	# parsed on first access and cached until the header changes
+
+	@property
+	def content_type(self) -> ContentType|None:
+		"""
+		The Content-Type header as a ContentType: the lowercase media type 
+		and its parameters, or None.
+		"""
+		return self.__view("content-type", _parse_content_type)
+
+	@property
+	def content_length(self) -> int|None:
+		"""
+		The Content-Length header as an int, or None if missing or invalid.
+		"""
+		return self.__view("content-length", _parse_content_length)
+
+	@property
+	def cache_control(self) -> Mapping[str, str|None]:
+		"""
+		The Cache-Control directives: lowercase names to their argument, 
+		None for directives without argument. Empty if there is none.
+		"""
+		return self.__view("cache-control", _parse_cache_control) or MappingProxyType({})
+
+	@property
+	def etag(self) -> ETag|None:
+		"""
+		The ETag header as an ETag: the tag without quotes and whether it 
+		is weak, or None.
+		"""
+		return self.__view("etag", _parse_etag)
+
+	@property
+	def last_modified(self) -> datetime|None:
+		"""
+		The Last-Modified header as a datetime, or None if missing or invalid.
+		"""
+		return self.__view("last-modified", _parse_last_modified)
+
+	@property
+	def vary(self) -> Tuple[str, ...]:
+		"""
+		The lowercase header names of the Vary header, ('*',) if the 
+		response varies on everything. Empty if there is none.
+		"""
+		return self.__view("vary", _parse_vary) or ()
+
+	@property
+	def links(self) -> Tuple[Link, ...]:
+		"""
+		The links of the Link header (RFC 8288), e.g. for pagination. 
+		Empty if there is none.
+		"""
+		return self.__view("link", _parse_links) or ()
 
 	#*  █████╗  ██████╗████████╗██╗ ██████╗ ███╗   ██╗
 	#* ██╔══██╗██╔════╝╚══██╔══╝██║██╔═══██╗████╗  ██║
@@ -155,9 +423,12 @@ class Headers:
 		header if it does not already exist.
 		"""
 
-		if name in self.__headers:
-			self.__headers[name] = f"{self.__headers[name]}, {value}"
-		else: self.set(name, value)
+		values = self.__headers.get(name)
+
+		if values is None: self.__headers[name] = [value]
+		else: values.append(value)
+
+		self.__parsed.pop(name, None)
 
 	@__check_http_header_name
 	def delete(self, name: str) -> None:
@@ -171,8 +442,8 @@ class Headers:
 			The name of the HTTP header you want to delete from the Headers object.
 		"""
 
-		if name in self.__headers:
-			del self.__headers[name]
+		self.__headers.pop(name, None)
+		self.__parsed.pop(name, None)
 
 	@__check_http_header_name
 	def get(self, name: str) -> str:
@@ -198,10 +469,27 @@ class Headers:
 			in the Headers object, it returns null.
 		"""
 
-		if name in self.__headers:
-			return self.__headers[name]
+		values = self.__headers.get(name)
 
-		return None
+		if values is None: return None
+		if len(values) == 1: return values[0]
+
+		return ", ".join(values)
+
+	def getSetCookie(self) -> List[str]:
+		"""
+		The getSetCookie() method of the Headers interface returns an array 
+		containing the values of all Set-Cookie headers associated with a 
+		response. This allows Headers objects to handle having multiple 
+		Set-Cookie headers, which wasn't possible prior to its implementation.
+
+		Returns
+		-------
+		List[str]
+			The Set-Cookie values, an empty list if there is none.
+		"""
+
+		return list(self.__headers.get("set-cookie", ()))
 
 	@__check_http_header_name
 	def has(self, name: str) -> bool:
@@ -240,7 +528,8 @@ class Headers:
 		None
 		"""
 
-		self.__headers[name] = value # <- "set" overwrites the value of an existing header.
+		self.__headers[name] = [value] # <- "set" overwrites the values of an existing header.
+		self.__parsed.pop(name, None)
 
 if __name__ == "__main__":
 	headers = Headers()
@@ -1,7 +1,11 @@
-from typing import Any
+from datetime import datetime
+from typing import Any, Iterator, Mapping, Tuple
+import json
 import requests
 
-from fetch.Response.Headers import Headers
+from fetch.Response.Decoder import iter_content, read_content
+from fetch.Response.Headers import ContentType, ETag, Headers, Link
+from promise import Promise
 
 # class Response:
 
@@ -18,23 +22,47 @@ from fetch.Response.Headers import Headers
 # 		if parameter in options: return options[parameter]
 # 		else: return default_value
 
-# 	def __parse_ok(status_code: int):
+# 	def __parse_ok(self, status_code: int):
 # 		return status_code >= 200 and status_code < 300
 
 
 class Response:
 
-	def __init__(self, body: requests.Response, options: dict = {}):
+	CHUNK_SIZE = 64 * 1024
+
+	def __init__(self, body: requests.Response|bytes|None = None, options: dict = {}):
+		"""
+		The Response() constructor creates a new Response object.
+
+		Parameters
+		----------
+		body : requests.Response|bytes|None
+			The body of the response: a streamed requests.Response, whose 
+			socket is only read when the body is consumed, or bytes.
+
+		options : dict
+			An object containing any custom settings that you want to apply 
+			to the response: status, statusText, headers, url, redirected, 
+			the signal aborting the read of the body, and onend, called with 
+			the number of bytes read from the network once a streamed body 
+			has been read or closed.
+		"""
 
 		#>> private properties
-		# self.__response = response
+		self.__response = body if isinstance(body, requests.Response) else None
+		self.__content = body if isinstance(body, (bytes, bytearray, memoryview)) else None
 		self.__type = None
+		self.__body_used = False
+		self.__signal = self.__parse_options(options, "signal")
+		self.__onend = self.__parse_options(options, "onend")
 
 		#>> public properties
 		self.status = self.__parse_options(options, "status", 200)
 		self.statusText = self.__parse_options(options, "statusText", '')
 		self.headers = self.__parse_headers(options)
-		self.ok = self.__parse_ok(body.status_code)
+		self.ok = self.__parse_ok(self.status)
+		self.url = self.__parse_options(options, "url", self.__response.url if self.__response is not None else '')
+		self.redirected = self.__parse_options(options, "redirected", bool(self.__response.history) if self.__response is not None else False)
 
 	def __parse_options(self, options: dict, parameter: str, default_value: Any = None):
 		if parameter in options: return options[parameter]
@@ -44,5 +72,240 @@ class Response:
 		if "headers" in options: return Headers(options["headers"])
 		else: return Headers()
 
-	def __parse_ok(status_code: int):
-		return status_code >= 200 and status_code < 300
\ No newline at end of file
+	def __parse_ok(self, status_code: int):
+		return status_code >= 200 and status_code < 300
+
+	#--------------------------------------------------------------------------------
+	#--->> Structured headers, parsed once, see Headers
+
+	@property
+	def content_type(self) -> ContentType|None:
+		return self.headers.content_type
+
+	@property
+	def content_length(self) -> int|None:
+		return self.headers.content_length
+
+	@property
+	def cache_control(self) -> Mapping[str, str|None]:
+		return self.headers.cache_control
+
+	@property
+	def etag(self) -> ETag|None:
+		return self.headers.etag
+
+	@property
+	def last_modified(self) -> datetime|None:
+		return self.headers.last_modified
+
+	@property
+	def vary(self) -> Tuple[str, ...]:
+		return self.headers.vary
+
+	@property
+	def links(self) -> Tuple[Link, ...]:
+		return self.headers.links
+
+	#--------------------------------------------------------------------------------
+	#--->> Body
+
+	def __end(self) -> None:
+		# calls onend once, when the streamed body is done with
+
+		onend, self.__onend = self.__onend, None
+		if onend is None: return
+
+		raw = self.__response.raw if self.__response is not None else None
+		onend(raw.tell() if raw is not None and hasattr(raw, "tell") else 0)
+
+	def __consume(self) -> None:
+
+		if self.__body_used:
+			raise TypeError("Failed to read the body: body stream already read")
+
+		self.__body_used = True
+
+	def __chunks(self, chunk_size: int) -> Iterator[memoryview]:
+		"""
+		Read the body into a single reusable buffer: every chunk is a view 
+		of this buffer, overwritten by the next read.
+		"""
+
+		response = self.__response
+		content = self.__content
+
+		# already in memory (cached or built from bytes): just slice it
+		if content is None and response is not None and response._content not in (False, None):
+			content = response._content
+
+		if content is not None:
+			view = memoryview(content)
+			for start in range(0, len(view), chunk_size): yield view[start:start + chunk_size]
+			return
+
+		if response is None or response.raw is None: return
+
+		try:
+			# a compressed body is decoded as it is read, see ContentDecoder
+			yield from iter_content(response, chunk_size)
+		except Exception:
+			# a read failing because its socket was shut down by an abort
+			if self.__signal is not None: self.__signal.throw_if_aborted()
+			raise
+		finally:
+			response.close() #-> the connection goes back to its pool
+			self.__end()
+
+	def __read_all(self) -> bytes:
+		self.__consume()
+
+		buffer = bytearray()
+		for chunk in self.__chunks(self.CHUNK_SIZE): buffer += chunk
+
+		return bytes(buffer)
+
+	@property
+	def bodyUsed(self) -> bool:
+		"""
+		The bodyUsed read-only property of the Response interface is a 
+		boolean value that indicates whether the body has been read yet.
+		"""
+		return self.__body_used
+
+	@property
+	def body(self) -> Iterator[memoryview]:
+		"""
+		The body read-only property of the Response interface is an iterator 
+		of the body contents, read from the socket as it is consumed.
+
+		Every chunk is a memoryview of a buffer reused for the next chunk: 
+		copy it, e.g. with bytes(chunk), to keep it after the next iteration.
+		"""
+		return self.iter_chunks()
+
+	def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+		"""
+		Parameters
+		----------
+		chunk_size : int
+			The size of the reusable read buffer.
+
+		Returns
+		-------
+			An iterator of memoryview chunks of the body, see body.
+		"""
+
+		self.__consume()
+		return self.__chunks(chunk_size)
+
+	def iter_lines(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+		"""
+		Parameters
+		----------
+		chunk_size : int
+			The size of the reusable read buffer.
+
+		Returns
+		-------
+			An iterator of the lines of the body, without their line ending, 
+			e.g. for NDJSON. Only the current partial line is kept in memory.
+		"""
+
+		self.__consume()
+
+		pending = bytearray()
+
+		for chunk in self.__chunks(chunk_size):
+			pending += chunk
+
+			start = 0
+			end = pending.find(b"\n")
+
+			while end != -1:
+				yield bytes(pending[start:end]).rstrip(b"\r")
+				start = end + 1
+				end = pending.find(b"\n", start)
+
+			del pending[:start]
+
+		if pending: yield bytes(pending).rstrip(b"\r")
+
+	def iter_json(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+		"""
+		Returns
+		-------
+			An iterator of the values of an NDJSON body, one per non-empty line.
+		"""
+
+		for line in self.iter_lines(chunk_size):
+			if line.strip(): yield json.loads(line)
+
+	def arrayBuffer(self) -> Promise:
+		"""
+		Returns
+		-------
+			A Promise that resolves with the body as bytes.
+		"""
+		return Promise(lambda resolve, _: resolve(self.__read_all()))
+
+	def text(self) -> Promise:
+		"""
+		Returns
+		-------
+			A Promise that resolves with the body decoded as UTF-8.
+		"""
+		return Promise(lambda resolve, _: resolve(self.__read_all().decode("utf-8", errors="replace")))
+
+	def json(self) -> Promise:
+		"""
+		Returns
+		-------
+			A Promise that resolves with the result of parsing the body 
+			text as JSON.
+		"""
+		return Promise(lambda resolve, _: resolve(json.loads(self.__read_all())))
+
+	def clone(self) -> 'Response':
+		"""
+		The clone() method of the Response interface creates a clone of a
+		response object, identical in every way, but stored in a different
+		variable.
+
+		A streamed body is read into memory first, releasing its
+		connection: both responses then read the same bytes, without copy.
+
+		Returns
+		-------
+			A new Response, whose body can be read independently.
+		"""
+
+		if self.__body_used:
+			raise TypeError("Failed to execute 'clone' on 'Response': Response body is already used")
+
+		response = self.__response
+
+		if response is not None and response._content is False:
+			try:
+				read_content(response)
+			except Exception:
+				if self.__signal is not None: self.__signal.throw_if_aborted()
+				raise
+			finally:
+				self.__end()
+
+		return Response(response if response is not None else self.__content, {
+			"status": self.status,
+			"statusText": self.statusText,
+			"headers": self.headers,
+			"url": self.url,
+			"redirected": self.redirected
+		})
+
+	def close(self) -> None:
+		"""
+		Release the connection without reading the rest of the body.
+		"""
+
+		self.__body_used = True
+		if self.__response is not None: self.__response.close()
+		self.__end()
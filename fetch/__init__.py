@@ -0,0 +1,12 @@
+from fetch.asyncio_transport import AsyncioTransport
+from fetch.client import Client, get_client, set_client
+from fetch.coalesce import SingleFlight
+from fetch.fetch import fetch, fetch_many
+from fetch.metrics import FetchMetrics, MetricsRegistry
+from fetch.ratelimit import LeakyBucket, PerHost, RateLimiter, RateLimitExceeded, TokenBucket
+from fetch.retry import HedgePolicy, RetryBudget, RetryPolicy
+from fetch.transport import LoopbackTransport, RequestsTransport, Transport
+from fetch.Response.Decoder import ContentDecoder, DecompressionBombError
+from fetch.Response.Headers import Headers
+from fetch.Response.Response import Response
+from promise.abort import AbortController, AbortError, AbortSignal
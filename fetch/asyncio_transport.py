@@ -0,0 +1,539 @@
+import asyncio
+import socket
+import ssl
+import time
+from collections import deque
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from fetch.Response.Decoder import ACCEPT_ENCODING, ContentDecoder
+from fetch.Response.Headers import Headers
+from fetch.Response.Response import Response
+from fetch.cache import HTTPCache
+from fetch.metrics import FetchMetrics, host_label
+from fetch.transport import Transport, _cancel_on_abort
+from promise import Promise
+from promise.promise import _background_loop
+
+MAX_REDIRECTS = 30 #-> as requests
+
+REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_READ_SIZE = 64 * 1024
+
+
+async def _timed(awaitable, timeout: float|None):
+	if timeout is None: return await awaitable
+	return await asyncio.wait_for(awaitable, timeout)
+
+
+_FROM_NETWORK = object() #-> the raw of a response read by this transport, None from the cache
+
+
+def _shell(status: int, reason: str, headers: Headers, content: bytes, url: str, redirected: bool) -> requests.Response:
+	# the final response as a requests.Response, the form the HTTPCache stores
+
+	response = requests.Response()
+	response.status_code = status
+	response.reason = reason
+	response.headers = requests.structures.CaseInsensitiveDict(headers)
+	response.url = url
+	response.raw = _FROM_NETWORK
+	response._content = content
+	response._content_consumed = True #-> nothing left to read on close
+
+	return response
+
+
+def _response(status: int, reason: str, headers: Headers, content: bytes, url: str, redirected: bool) -> Response:
+	return Response(content, {
+		"status": status,
+		"statusText": reason,
+		"headers": headers,
+		"url": url,
+		"redirected": redirected
+	})
+
+
+class _Connection:
+	"""
+	A keep-alive HTTP/1.1 connection, used by one request at a time.
+	"""
+
+	__slots__ = ("reader", "writer", "last_used")
+
+	def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		self.reader = reader
+		self.writer = writer
+		self.last_used = time.monotonic()
+
+	def usable(self, now: float, idle_timeout: float) -> bool:
+		# closed by the server while idle, or idle for too long
+		return now - self.last_used < idle_timeout and not self.reader.at_eof() and not self.writer.is_closing()
+
+	def close(self) -> None:
+		self.writer.close()
+
+
+class AsyncioTransport(Transport):
+	"""
+	A transport sending HTTP/1.1 requests with asyncio streams: requests in
+	flight hold no thread, thousands of them share one event loop thread.
+
+	Connections are pooled per origin and kept alive; a connection is only
+	reused once the whole previous response has been read, never pipelined.
+	A request failing on a reused connection before any response, which the
+	server may have closed meanwhile, is sent again on a new connection if
+	idempotent. Bodies are read in full, chunked or not, before the Response
+	is resolved; compressed ones are decoded as they arrive.
+
+	Requests go through the HTTPCache of the Client, if any, as with the
+	requests transport.
+	"""
+
+	def __init__(self, loop: asyncio.AbstractEventLoop|None = None, max_connections_per_host: int = 100, idle_timeout: float = 30.0, ssl_context: ssl.SSLContext|None = None, max_header_size: int = 64 * 1024):
+		"""
+		Args:
+			loop: The event loop running the requests; a shared background
+				loop by default.
+			max_connections_per_host: The maximum number of connections open
+				to an origin; further requests wait for one to be free.
+			idle_timeout: The number of seconds after which an idle connection
+				is not reused anymore.
+			ssl_context: The SSLContext of https connections, the default
+				context of the ssl module by default.
+			max_header_size: The maximum size of a response header block, and
+				of a chunk size line.
+		"""
+
+		self.loop = loop
+		self.max_connections_per_host = max_connections_per_host
+		self.idle_timeout = idle_timeout
+		self.ssl_context = ssl_context
+		self.max_header_size = max_header_size
+
+		# only touched from the loop: no lock
+		self.__idle: Dict[tuple, List[_Connection]] = {}
+		self.__active: Dict[tuple, int] = {}
+		self.__waiters: Dict[tuple, deque] = {}
+		self.__closed = False
+
+	#--------------------------------------------------------------------------------
+	#--->> Pool
+
+	async def __open(self, host: str, port: int, context: ssl.SSLContext|None) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, float, float]:
+		# returns the streams, and the seconds spent resolving the host and
+		# connecting to it: every address is tried in turn
+
+		loop = asyncio.get_running_loop()
+		started = time.perf_counter()
+
+		addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+		resolved = time.perf_counter()
+
+		failure = OSError(f"No address found for {host}")
+
+		for family, kind, protocol, _, address in addresses:
+			sock = socket.socket(family, kind, protocol)
+			sock.setblocking(False)
+
+			try:
+				await loop.sock_connect(sock, address)
+			except OSError as error:
+				sock.close()
+				failure = error
+				continue
+			except BaseException:
+				sock.close()
+				raise
+
+			try:
+				reader, writer = await asyncio.open_connection(
+					sock=sock,
+					ssl=context,
+					server_hostname=host if context is not None else None,
+					limit=self.max_header_size
+				)
+			except BaseException:
+				sock.close()
+				raise
+
+			return reader, writer, resolved - started, time.perf_counter() - resolved
+
+		raise failure
+
+	async def __acquire(self, origin: tuple, connect_timeout: float|None, fresh: bool, metrics: FetchMetrics|None = None) -> Tuple[_Connection, bool]:
+
+		scheme, host, port = origin
+		label = host_label(f"{scheme}://{host}:{port}") if metrics is not None else None
+		started = time.perf_counter()
+
+		while True:
+
+			idle = self.__idle.get(origin)
+			now = time.monotonic()
+
+			# the most recently used connection is the most likely to be alive
+			while idle and not fresh:
+				connection = idle.pop()
+
+				if connection.usable(now, self.idle_timeout):
+					self.__active[origin] = self.__active.get(origin, 0) + 1
+					if metrics is not None: metrics.observe_connection(label, True, time.perf_counter() - started)
+					return connection, True
+
+				connection.close()
+
+			if self.__active.get(origin, 0) < self.max_connections_per_host:
+				self.__active[origin] = self.__active.get(origin, 0) + 1
+				if metrics is not None: metrics.observe_connection(label, False, time.perf_counter() - started)
+
+				try:
+					context = None
+
+					if scheme == "https":
+						if self.ssl_context is None: self.ssl_context = ssl.create_default_context()
+						context = self.ssl_context
+
+					reader, writer, dns, connect = await _timed(self.__open(host, port, context), connect_timeout)
+
+				except asyncio.TimeoutError:
+					self.__release(origin, None, False)
+					raise requests.exceptions.ConnectTimeout(f"Connection to {host}:{port} timed out (connect timeout={connect_timeout})")
+				except OSError as error:
+					self.__release(origin, None, False)
+					raise requests.exceptions.ConnectionError(f"Failed to connect to {host}:{port}: {error}") from error
+				except BaseException:
+					self.__release(origin, None, False)
+					raise
+
+				if metrics is not None: metrics.observe_connect(label, dns, connect)
+
+				return _Connection(reader, writer), False
+
+			waiter = asyncio.get_running_loop().create_future()
+			self.__waiters.setdefault(origin, deque()).append(waiter)
+
+			try:
+				await waiter
+			except asyncio.CancelledError:
+				if waiter.done() and not waiter.cancelled(): self.__wake(origin) #-> pass the free slot on
+				else: self.__waiters[origin].remove(waiter)
+				raise
+
+	def __release(self, origin: tuple, connection: _Connection|None, reusable: bool) -> None:
+
+		self.__active[origin] -= 1
+
+		if connection is not None:
+			if reusable and not self.__closed:
+				connection.last_used = time.monotonic()
+				self.__idle.setdefault(origin, []).append(connection)
+			else:
+				connection.close()
+
+		self.__wake(origin)
+
+	def __wake(self, origin: tuple) -> None:
+
+		waiters = self.__waiters.get(origin)
+
+		while waiters:
+			waiter = waiters.popleft()
+
+			if not waiter.done():
+				waiter.set_result(None)
+				return
+
+	def __close_idle(self) -> None:
+
+		for connections in self.__idle.values():
+			for connection in connections: connection.close()
+
+		self.__idle.clear()
+
+	#--------------------------------------------------------------------------------
+	#--->> HTTP/1.1
+
+	def __head(self, method: str, target: str, host: str, headers: dict, body: bytes|None, keepalive: bool) -> bytes:
+
+		lines = [f"{method} {target} HTTP/1.1"]
+		names = set()
+
+		for name, value in headers.items():
+			name, value = str(name), str(value)
+
+			if "\r" in name or "\n" in name or "\r" in value or "\n" in value:
+				raise requests.exceptions.InvalidHeader(f"Invalid header {name!r}: line breaks are not allowed")
+
+			names.add(name.lower())
+			lines.append(f"{name}: {value}")
+
+		if "host" not in names: lines.append(f"Host: {host}")
+		if "accept" not in names: lines.append("Accept: */*")
+		if "accept-encoding" not in names: lines.append(f"Accept-Encoding: {ACCEPT_ENCODING}")
+		if not keepalive and "connection" not in names: lines.append("Connection: close")
+
+		if body is not None: lines.append(f"Content-Length: {len(body)}")
+		elif method in ("POST", "PUT", "PATCH"): lines.append("Content-Length: 0")
+
+		lines.append("\r\n")
+
+		return "\r\n".join(lines).encode("latin-1")
+
+	async def __read_head(self, reader: asyncio.StreamReader, read_timeout: float|None) -> Tuple[str, int, str, Headers]:
+
+		while True:
+			block = await _timed(reader.readuntil(b"\r\n\r\n"), read_timeout)
+
+			status_line, _, fields = block.partition(b"\r\n")
+			version, _, rest = status_line.decode("latin-1").partition(" ")
+			code, _, reason = rest.partition(" ")
+
+			if not version.startswith("HTTP/") or not code.isdigit():
+				raise requests.exceptions.ConnectionError(f"Invalid status line {status_line[:100]!r}")
+
+			status = int(code)
+
+			# interim responses, e.g. 100 Continue, precede the final one
+			if 100 <= status < 200 and status != 101: continue
+
+			return version, status, reason, Headers.from_raw(fields)
+
+	async def __read_body(self, reader: asyncio.StreamReader, method: str, status: int, headers: Headers, read_timeout: float|None) -> Tuple[bytes, bool, int]:
+		# returns the body, whether its end was framed, so that the connection
+		# can be reused, and the number of bytes received before decoding
+
+		if method == "HEAD" or status in (204, 304) or 100 <= status < 200: return b"", True, 0
+
+		# a compressed body is decoded as it arrives: only the decoded body is kept
+		coding = headers.get("content-encoding")
+		decoder = ContentDecoder(coding) if coding and coding.strip().lower() != "identity" and ContentDecoder.supports(coding) else None
+
+		chunks = []
+		received = 0
+
+		def keep(data: bytes) -> None:
+			nonlocal received
+
+			received += len(data)
+
+			if decoder is None: chunks.append(data)
+			else: chunks.extend(decoder.decode(data, _READ_SIZE))
+
+		encoding = headers.get("transfer-encoding")
+		length = headers.content_length
+		framed = True
+
+		if encoding is not None and encoding.lower().rstrip().endswith("chunked"):
+
+			while True:
+				line = await _timed(reader.readuntil(b"\r\n"), read_timeout)
+				size = int(line.split(b";", 1)[0].strip(), 16)
+
+				if size == 0: break
+
+				while size:
+					data = await _timed(reader.readexactly(min(size, _READ_SIZE)), read_timeout)
+					size -= len(data)
+					keep(data)
+
+				await _timed(reader.readexactly(2), read_timeout) #-> CRLF
+
+			# the trailer fields, up to an empty line
+			while await _timed(reader.readuntil(b"\r\n"), read_timeout) != b"\r\n": pass
+
+		elif length is not None:
+
+			while length:
+				data = await _timed(reader.readexactly(min(length, _READ_SIZE)), read_timeout)
+				length -= len(data)
+				keep(data)
+
+		else:
+			# delimited by the end of the connection
+			framed = False
+
+			while True:
+				data = await _timed(reader.read(_READ_SIZE), read_timeout)
+				if not data: break
+				keep(data)
+
+		if decoder is not None: chunks.extend(decoder.flush(_READ_SIZE))
+
+		return b"".join(chunks), framed, received
+
+	async def __request(self, method: str, url: str, headers: dict, body: bytes|None, options: dict, metrics: FetchMetrics|None) -> Tuple[int, str, Headers, bytes, float, int]:
+		# returns the response, the seconds to its headers and the number of
+		# bytes of its body received
+
+		parts = urlsplit(url)
+		scheme = parts.scheme.lower()
+
+		if scheme not in _DEFAULT_PORTS: raise requests.exceptions.InvalidSchema(f"No connection adapters were found for {url!r}")
+		if not parts.hostname: raise requests.exceptions.InvalidURL(f"Invalid URL {url!r}: no host supplied")
+
+		origin = (scheme, parts.hostname, parts.port or _DEFAULT_PORTS[scheme])
+		target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+		keepalive = options.get("keepalive", True)
+		connect_timeout = options.get("connectTimeout")
+		read_timeout = options.get("readTimeout")
+
+		head = self.__head(method, target, parts.netloc.rpartition("@")[2], headers, body, keepalive)
+
+		fresh = False
+
+		while True:
+			started = time.perf_counter()
+			connection, reused = await self.__acquire(origin, connect_timeout, fresh, metrics)
+			reusable = False
+
+			try:
+				connection.writer.write(head)
+				if body: connection.writer.write(body)
+
+				try:
+					await _timed(connection.writer.drain(), read_timeout)
+					version, status, reason, response_headers = await self.__read_head(connection.reader, read_timeout)
+				except (ConnectionError, asyncio.IncompleteReadError):
+					# closed by the server while idle: nothing was answered
+					if reused and method in IDEMPOTENT_METHODS:
+						fresh = True
+						continue
+					raise
+
+				ttfb = time.perf_counter() - started
+				content, framed, received = await self.__read_body(connection.reader, method, status, response_headers, read_timeout)
+
+				persistence = (response_headers.get("connection") or "").lower()
+				reusable = framed and keepalive and "close" not in persistence and (version == "HTTP/1.1" or "keep-alive" in persistence)
+
+				return status, reason, response_headers, content, ttfb, received
+
+			except asyncio.TimeoutError:
+				raise requests.exceptions.ReadTimeout(f"Read from {origin[1]}:{origin[2]} timed out (read timeout={read_timeout})")
+			except requests.exceptions.RequestException:
+				raise
+			except (OSError, EOFError, ValueError, asyncio.LimitOverrunError) as error:
+				raise requests.exceptions.ConnectionError(f"Connection to {origin[1]}:{origin[2]} failed: {error!r}") from error
+			finally:
+				self.__release(origin, connection, reusable)
+
+	async def __fetch(self, url: str, options: dict, client: Any) -> Response:
+		# only the final response is recorded, as with the requests transport: 
+		# neither the redirects followed, nor a 304 refreshing a cached response
+
+		metrics: FetchMetrics|None = getattr(client, "metrics", None)
+		cache: HTTPCache|None = getattr(client, "cache", None)
+		method = (options.get("method") or "GET").upper()
+		headers = {**(options.get("headers") or {})}
+
+		started = time.perf_counter()
+		answers = []
+
+		async def send(extra_headers: dict) -> requests.Response:
+			answer = await self.__follow(url, {**options, "headers": {**headers, **extra_headers}}, metrics)
+			answers.append(answer)
+			return _shell(*answer[0])
+
+		try:
+			if cache is None:
+				requests_response = await send({})
+			else:
+				# only a lookup of the cache is a hit or a miss, not a request bypassing it
+				onlookup = (lambda hit: metrics.observe_cache(host_label(url), hit)) if metrics is not None else None
+
+				# the cache is only touched from the loop, which its stores are safe for
+				requests_response = await cache.handle_async(method, url, headers, options.get("cache") or "default", send, onlookup)
+		except Exception:
+			if metrics is not None: metrics.observe_failure(host_label(url), method)
+			raise
+
+		network = requests_response.raw is _FROM_NETWORK
+
+		if metrics is not None:
+			label = host_label(url)
+			body = options.get("body")
+
+			sent = len(body.encode("utf-8")) if isinstance(body, str) else memoryview(body).nbytes if isinstance(body, (bytes, bytearray, memoryview)) else 0
+			metrics.observe_response(label, method, requests_response.status_code, answers[-1][1] - started if answers else None, sent)
+
+			if network: metrics.observe_body(label, answers[-1][2], time.perf_counter() - started)
+
+		# from the network: the Response keeps its repeated headers apart
+		if network: return _response(*answers[-1][0])
+
+		return Response(requests_response.content, {
+			"status": requests_response.status_code,
+			"statusText": requests_response.reason,
+			"headers": requests_response.headers,
+			"url": requests_response.url
+		})
+
+	async def __follow(self, url: str, options: dict, metrics: FetchMetrics|None) -> Tuple[Tuple[int, str, Headers, bytes, str, bool], float, int]:
+		# returns the status, reason, headers and body of the final response, 
+		# its URL and whether a redirect was followed; the perf_counter() time
+		# its headers were received at, and the number of bytes of its body
+
+		method = (options.get("method") or "GET").upper()
+		headers = {**(options.get("headers") or {})} #-> any mapping, e.g. a Headers, as the requests transport
+		redirect = options.get("redirect") or "follow"
+		body = options.get("body")
+
+		if isinstance(body, str): body = body.encode()
+		elif isinstance(body, (bytearray, memoryview)): body = bytes(body)
+		elif body is not None and not isinstance(body, bytes):
+			raise TypeError(f"Failed to fetch '{url}': the body must be bytes or str with this transport")
+
+		redirected = False
+
+		for _ in range(MAX_REDIRECTS + 1):
+
+			requested = time.perf_counter()
+			status, reason, response_headers, content, ttfb, received = await self.__request(method, url, headers, body, options, metrics)
+			location = response_headers.get("location")
+
+			if status not in REDIRECT_STATUSES or location is None or redirect == "manual":
+				return (status, reason, response_headers, content, url, redirected), requested + ttfb, received
+
+			if redirect == "error": raise TypeError(f"Failed to fetch '{url}': unexpected redirect")
+
+			target = urljoin(url, location)
+
+			# credentials are not sent to another origin
+			if urlsplit(target).netloc != urlsplit(url).netloc:
+				headers = { name: value for name, value in headers.items() if name.lower() not in ("authorization", "cookie") }
+
+			if status == 303 and method != "HEAD" or status in (301, 302) and method == "POST":
+				method, body = "GET", None
+				headers = { name: value for name, value in headers.items() if not name.lower().startswith("content-") }
+
+			url = target
+			redirected = True
+
+		raise requests.exceptions.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects")
+
+	#--------------------------------------------------------------------------------
+	#--->> Transport
+
+	def send(self, url: str, options: dict, client: Any) -> Promise:
+
+		if self.loop is None: self.loop = _background_loop()
+
+		promise = Promise.from_coroutine(self.__fetch(url, options, client), self.loop)
+
+		# the cancellation of the Promise cancels the task, which closes its connection
+		return _cancel_on_abort(promise, options.get("signal"))
+
+	def close(self) -> None:
+
+		self.__closed = True
+
+		if self.loop is not None and not self.loop.is_closed():
+			self.loop.call_soon_threadsafe(self.__close_idle)
@@ -0,0 +1,484 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Generator
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from fetch.Response.Decoder import tee
+from fetch.Response.Headers import parse_cache_control
+
+# https://developer.mozilla.org/en-US/docs/Web/API/Request/cache
+MODES = ("default", "no-store", "reload", "no-cache", "force-cache", "only-if-cached")
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-15.1 (heuristically cacheable)
+CACHEABLE_STATUSES = frozenset((200, 203, 204, 206, 300, 301, 308, 404, 405, 410, 414, 501))
+
+CACHEABLE_METHODS = frozenset(("GET", "HEAD"))
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "TRACE"))
+
+
+def _parse_date(value: str|None) -> float|None:
+	if not value: return None
+
+	try:
+		return parsedate_to_datetime(value).timestamp()
+	except (TypeError, ValueError):
+		return None
+
+
+def _parse_uint(value: str|None) -> int|None:
+	try:
+		return max(0, int(value))
+	except (TypeError, ValueError):
+		return None
+
+
+class CacheEntry:
+	"""
+	A stored response and the request headers it varies on.
+	"""
+
+	__slots__ = ("url", "status", "reason", "headers", "content", "vary", "stored_at")
+
+	def __init__(self, url: str, status: int, reason: str, headers: dict, content: bytes, vary: dict):
+		self.url = url
+		self.status = status
+		self.reason = reason
+		self.headers = CaseInsensitiveDict(headers)
+		self.content = content
+		self.vary = vary
+		self.stored_at = time.time()
+
+	def __getstate__(self):
+		return { name: getattr(self, name) for name in self.__slots__ }
+
+	def __setstate__(self, state):
+		for name, value in state.items(): setattr(self, name, value)
+
+	@property
+	def size(self) -> int:
+		return len(self.content) + sum(len(name) + len(value) for name, value in self.headers.items())
+
+	def age(self, now: float|None = None) -> float:
+		"""Returns: the current age of the response in seconds (RFC 9111 4.2.3)."""
+
+		if now is None: now = time.time()
+
+		received = _parse_uint(self.headers.get("Age")) or 0
+		date = _parse_date(self.headers.get("Date"))
+		apparent = max(0, self.stored_at - date) if date is not None else 0
+
+		return max(received, apparent) + (now - self.stored_at)
+
+	def freshness_lifetime(self) -> float:
+		"""Returns: the number of seconds the response is fresh for (RFC 9111 4.2.1)."""
+
+		directives = parse_cache_control(self.headers.get("Cache-Control"))
+
+		max_age = _parse_uint(directives.get("max-age"))
+		if max_age is not None: return max_age
+
+		expires = self.headers.get("Expires")
+
+		if expires is not None:
+			expires = _parse_date(expires)
+			if expires is None: return 0 #-> an invalid Expires means already expired
+
+			date = _parse_date(self.headers.get("Date")) or self.stored_at
+			return max(0, expires - date)
+
+		# heuristic freshness: 10% of the time since the last modification, at most a day
+		last_modified = _parse_date(self.headers.get("Last-Modified"))
+
+		if last_modified is not None and self.status in CACHEABLE_STATUSES:
+			date = _parse_date(self.headers.get("Date")) or self.stored_at
+			return min(86400, max(0, date - last_modified) / 10)
+
+		return 0
+
+	def is_fresh(self) -> bool:
+		directives = parse_cache_control(self.headers.get("Cache-Control"))
+		if "no-cache" in directives: return False
+
+		return self.freshness_lifetime() > self.age()
+
+	def matches(self, headers: dict) -> bool:
+		"""Returns: True if the request headers select this variant."""
+		headers = CaseInsensitiveDict(headers or {})
+		return all(headers.get(name) == value for name, value in self.vary.items())
+
+	def validators(self) -> dict:
+		"""Returns: the conditional request headers revalidating this response."""
+
+		validators = {}
+
+		if "ETag" in self.headers: validators["If-None-Match"] = self.headers["ETag"]
+		if "Last-Modified" in self.headers: validators["If-Modified-Since"] = self.headers["Last-Modified"]
+
+		return validators
+
+	def to_response(self) -> requests.Response:
+		"""Returns: a requests.Response built from the stored one."""
+
+		response = requests.Response()
+		response.status_code = self.status
+		response.reason = self.reason
+		response.headers = CaseInsensitiveDict(self.headers)
+		response.url = self.url
+		response._content = self.content
+		response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+
+		return response
+
+
+#--------------------------------------------------------------------------------
+#--->> Stores
+
+class MemoryStore:
+	"""
+	A thread-safe LRU store bounded by the total size of its entries.
+	"""
+
+	def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+		"""
+		Args:
+			max_bytes: The maximum total size of the stored bodies and headers.
+		"""
+
+		self.max_bytes = max_bytes
+		self.size = 0
+
+		self.__lock = threading.Lock()
+		self.__entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self.__entries)
+
+	def get(self, key: str) -> CacheEntry|None:
+		with self.__lock:
+			entry = self.__entries.get(key)
+			if entry is not None: self.__entries.move_to_end(key)
+			return entry
+
+	def set(self, key: str, entry: CacheEntry) -> None:
+
+		size = entry.size
+		if size > self.max_bytes: return #-> would evict everything else
+
+		with self.__lock:
+
+			previous = self.__entries.pop(key, None)
+			if previous is not None: self.size -= previous.size
+
+			self.__entries[key] = entry
+			self.size += size
+
+			while self.size > self.max_bytes:
+				_, evicted = self.__entries.popitem(last=False)
+				self.size -= evicted.size
+
+	def delete(self, key: str) -> None:
+		with self.__lock:
+			entry = self.__entries.pop(key, None)
+			if entry is not None: self.size -= entry.size
+
+	def clear(self) -> None:
+		with self.__lock:
+			self.__entries.clear()
+			self.size = 0
+
+
+class DiskStore:
+	"""
+	A store keeping one pickle file per entry in a directory. Writes are
+	atomic, so several processes can share the directory.
+	"""
+
+	def __init__(self, directory: str):
+		"""
+		Args:
+			directory: The directory of the entries, created if missing.
+		"""
+
+		self.directory = directory
+		os.makedirs(directory, exist_ok=True)
+
+	def __path(self, key: str) -> str:
+		return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+	def get(self, key: str) -> CacheEntry|None:
+		try:
+			with open(self.__path(key), "rb") as file:
+				return pickle.load(file)
+		except (OSError, pickle.UnpicklingError, EOFError):
+			return None
+
+	def set(self, key: str, entry: CacheEntry) -> None:
+
+		descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+
+		try:
+			with os.fdopen(descriptor, "wb") as file:
+				pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(temporary, self.__path(key))
+		except OSError:
+			try: os.unlink(temporary)
+			except OSError: pass
+
+	def delete(self, key: str) -> None:
+		try: os.unlink(self.__path(key))
+		except OSError: pass
+
+	def clear(self) -> None:
+		for name in os.listdir(self.directory):
+			try: os.unlink(os.path.join(self.directory, name))
+			except OSError: pass
+
+
+#--------------------------------------------------------------------------------
+#--->> Cache
+
+class HTTPCache:
+	"""
+	A private HTTP cache (RFC 9111) following the cache modes of fetch.
+
+	Responses are kept in an in-memory LRU and, optionally, in a DiskStore
+	behind it. Stale responses with an ETag or a Last-Modified header are
+	revalidated with a conditional request, a 304 refreshing the stored
+	response instead of downloading it again.
+	"""
+
+	def __init__(self, memory: MemoryStore|None = None, disk: DiskStore|None = None):
+		"""
+		Args:
+			memory: The in-memory store, a 32 MiB MemoryStore by default.
+			disk: An optional DiskStore, looked up on memory misses.
+		"""
+
+		self.memory = memory if memory is not None else MemoryStore()
+		self.disk = disk
+
+		self.hits = 0
+		self.misses = 0
+		self.revalidations = 0
+
+	#--------------------------------------------------------------------------------
+	#--->> Private methods
+
+	def __key(self, method: str, url: str) -> str:
+		return f"{method.upper()} {url}"
+
+	def __lookup(self, key: str, headers: dict) -> CacheEntry|None:
+
+		entry = self.memory.get(key)
+
+		if entry is None and self.disk is not None:
+			entry = self.disk.get(key)
+			if entry is not None: self.memory.set(key, entry)
+
+		if entry is not None and not entry.matches(headers): return None
+
+		return entry
+
+	def __store(self, key: str, method: str, headers: dict, response: requests.Response) -> None:
+
+		if method.upper() not in CACHEABLE_METHODS: return
+		if response.status_code not in CACHEABLE_STATUSES: return
+
+		directives = parse_cache_control(response.headers.get("Cache-Control"))
+		if "no-store" in directives: return
+
+		vary = response.headers.get("Vary", "")
+		if vary.strip() == "*": return
+
+		# storing means buffering the body: never for one too large to be kept
+		length = _parse_uint(response.headers.get("Content-Length"))
+		if length is not None and length > self.memory.max_bytes: return
+
+		request_headers = CaseInsensitiveDict(headers or {})
+		vary = { name.strip().lower(): request_headers.get(name.strip()) for name in vary.split(",") if name.strip() }
+
+		entry = CacheEntry(response.url, response.status_code, response.reason, response.headers, b"", vary)
+
+		# nothing to gain from a response which is neither fresh nor revalidable
+		if not entry.freshness_lifetime() and not entry.validators(): return
+
+		# the body is copied as the consumer reads it, never buffered up front,
+		# and stored once read in full; the copy is dropped as soon as it is
+		# too large to be kept
+		buffer = bytearray()
+		limit = self.memory.max_bytes
+
+		def sink(chunk: memoryview|None) -> None:
+			nonlocal buffer
+
+			if buffer is None: return
+
+			if chunk is None:
+				entry.content, buffer = bytes(buffer), None
+
+				# the body is stored decoded: its headers must describe it, as
+				# there is no body to describe after a HEAD
+				if method.upper() != "HEAD":
+					for name in ("Content-Encoding", "Transfer-Encoding"): entry.headers.pop(name, None)
+					entry.headers["Content-Length"] = str(len(entry.content))
+
+				self.memory.set(key, entry)
+				if self.disk is not None: self.disk.set(key, entry)
+
+			elif len(buffer) + len(chunk) > limit:
+				buffer = None
+			else:
+				buffer += chunk
+
+		# a body read already, e.g. by a transport reading whole bodies
+		if response._content not in (False, None):
+			sink(memoryview(response._content))
+			sink(None)
+		else:
+			tee(response, sink)
+
+	def __invalidate(self, url: str) -> None:
+		for method in CACHEABLE_METHODS:
+			self.memory.delete(self.__key(method, url))
+			if self.disk is not None: self.disk.delete(self.__key(method, url))
+
+	def __refresh(self, key: str, entry: CacheEntry, response: requests.Response) -> CacheEntry:
+		# a 304 carries the updated metadata of the stored response
+		headers = CaseInsensitiveDict(entry.headers)
+
+		for name, value in response.headers.items():
+			if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"): headers[name] = value
+
+		refreshed = CacheEntry(entry.url, entry.status, entry.reason, headers, entry.content, entry.vary)
+
+		self.memory.set(key, refreshed)
+		if self.disk is not None: self.disk.set(key, refreshed)
+
+		return refreshed
+
+	def __answer(self, method: str, url: str, headers: dict, mode: str, onlookup: Callable[[bool], None]|None) -> Generator[dict, requests.Response, requests.Response]:
+		# the logic of handle(), free of any I/O: it yields the extra headers of 
+		# every request to send over the network, is sent back its response, 
+		# and returns the answer
+
+		if mode not in MODES:
+			raise TypeError(f"Failed to execute 'fetch': '{mode}' is not a valid cache mode")
+
+		key = self.__key(method, url)
+
+		# an unsafe method succeeding invalidates what is stored for the URL, 
+		# and for the URLs of its Location and Content-Location on the same 
+		# origin (RFC 9111 4.4)
+		if method.upper() not in SAFE_METHODS:
+			response = yield {}
+
+			if response.status_code < 400:
+				self.__invalidate(url)
+
+				for name in ("Location", "Content-Location"):
+					target = response.headers.get(name)
+					if target is None: continue
+
+					target = urljoin(response.url or url, target)
+					if urlsplit(target)[:2] == urlsplit(url)[:2]: self.__invalidate(target)
+
+			return response
+
+		if mode == "no-store" or method.upper() not in CACHEABLE_METHODS:
+			return (yield {})
+
+		if mode == "reload":
+			response = yield {}
+			self.__store(key, method, headers, response)
+			return response
+
+		entry = self.__lookup(key, headers)
+
+		if entry is not None and (mode in ("force-cache", "only-if-cached") or (mode == "default" and entry.is_fresh())):
+			self.hits += 1
+			if onlookup is not None: onlookup(True)
+			return entry.to_response()
+
+		if mode == "only-if-cached":
+			self.misses += 1
+			if onlookup is not None: onlookup(False)
+			raise TypeError(f"Failed to fetch '{url}': not in cache (only-if-cached)")
+
+		if entry is not None and entry.validators():
+			self.revalidations += 1
+			response = yield entry.validators()
+
+			if response.status_code == 304:
+				response.close()
+				self.hits += 1
+				if onlookup is not None: onlookup(True)
+				return self.__refresh(key, entry, response).to_response()
+
+		else:
+			self.misses += 1
+			response = yield {}
+
+		# a stale response replaced by a new one was a miss too
+		if onlookup is not None: onlookup(False)
+
+		self.__store(key, method, headers, response)
+
+		return response
+
+	#--------------------------------------------------------------------------------
+	#--->> Public methods
+
+	def handle(self, method: str, url: str, headers: dict, mode: str, send: Callable[[dict], requests.Response], onlookup: Callable[[bool], None]|None = None) -> requests.Response:
+		"""Answer a request from the cache, the network, or both.
+
+		Args:
+			method: The HTTP method.
+			url: The URL of the request.
+			headers: The request headers.
+			mode: The fetch cache mode, one of MODES.
+			send: A function sending the request with extra headers over the network.
+			onlookup: An optional function called with True on a hit and False on
+				a miss, only when the cache was looked up: requests bypassing it,
+				e.g. a POST or the 'no-store' and 'reload' modes, are neither.
+
+		Returns:
+			The requests.Response.
+
+		Raises:
+			TypeError: if mode is 'only-if-cached' and nothing is cached, or if
+				the mode is unknown.
+		"""
+
+		steps = self.__answer(method, url, headers, mode, onlookup)
+
+		try:
+			extra_headers = next(steps)
+			while True: extra_headers = steps.send(send(extra_headers))
+		except StopIteration as stop:
+			return stop.value
+
+	async def handle_async(self, method: str, url: str, headers: dict, mode: str, send: Callable[[dict], Awaitable[requests.Response]], onlookup: Callable[[bool], None]|None = None) -> requests.Response:
+		"""As handle(), for an asyncio transport: send is a coroutine function."""
+
+		steps = self.__answer(method, url, headers, mode, onlookup)
+
+		try:
+			extra_headers = next(steps)
+			while True: extra_headers = steps.send(await send(extra_headers))
+		except StopIteration as stop:
+			return stop.value
+
+	def clear(self) -> None:
+		"""Remove every stored response."""
+
+		self.memory.clear()
+		if self.disk is not None: self.disk.clear()
@@ -0,0 +1,413 @@
+import socket
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+try:
+	from urllib3.exceptions import NameResolutionError
+except ImportError: #-> urllib3 1.x: the resolution of hosts is not timed apart
+	NameResolutionError = None
+
+from fetch.cache import HTTPCache
+from fetch.coalesce import SingleFlight
+from fetch.metrics import FetchMetrics
+from fetch.ratelimit import RateLimiter
+from fetch.Response.Decoder import ACCEPT_ENCODING
+from fetch.transport import RequestsTransport, Transport
+from promise import AbortSignal, Promise
+
+
+#--------------------------------------------------------------------------------
+#--->> Abortable connections
+
+# the AbortSignal, and the FetchMetrics, of the request being sent by the 
+# current thread: urllib3 takes the connection out of its pool deep inside 
+# requests, with no way to pass it an argument
+_current = threading.local()
+
+def _label(host: str, port: int|None, default_port: int) -> str:
+	# as fetch.metrics.host_label
+	host = host.lower()
+	return host if port is None or port == default_port else f"{host}:{port}"
+
+class _AbortableMixin:
+	"""
+	A connection pool shutting down the socket of a connection in use when
+	the signal of its request aborts, which wakes up a thread blocked in
+	connect(), send() or recv() right away.
+	"""
+
+	def _get_conn(self, timeout=None):
+
+		signal: AbortSignal|None = getattr(_current, "signal", None)
+		if signal is not None: signal.throw_if_aborted()
+
+		metrics: FetchMetrics|None = getattr(_current, "metrics", None)
+		if metrics is not None: started = time.perf_counter()
+
+		conn = super()._get_conn(timeout)
+
+		# a connection still holding its socket was kept alive by the pool
+		if metrics is not None: metrics.observe_connection(_label(self.host, self.port, self.ConnectionCls.default_port), conn.sock is not None, time.perf_counter() - started)
+
+		if signal is not None:
+
+			def listener(reason, conn=conn):
+				sock = conn.sock
+				if sock is None: return
+
+				try: sock.shutdown(socket.SHUT_RDWR)
+				except OSError: pass
+
+			conn._fetch_abort = (signal, listener)
+			signal.add_listener(listener)
+
+		return conn
+
+	def _put_conn(self, conn):
+
+		abort = getattr(conn, "_fetch_abort", None)
+
+		if abort is not None:
+			signal, listener = abort
+			conn._fetch_abort = None
+			signal.remove_listener(listener)
+
+			# a connection shut down by an abort can not be reused
+			if signal.aborted: conn.close()
+
+		super()._put_conn(conn)
+
+class _TimedMixin:
+	"""
+	A connection timing the resolution of its host and its opening (TLS 
+	handshake included) for the FetchMetrics of its request, if any. With
+	urllib3 1.x, only the opening is timed.
+	"""
+
+	_fetch_dns: float|None = None
+
+	def connect(self):
+
+		metrics: FetchMetrics|None = getattr(_current, "metrics", None)
+		if metrics is None: return super().connect()
+
+		self._fetch_dns = None
+		started = time.perf_counter()
+
+		super().connect()
+
+		elapsed = time.perf_counter() - started
+		metrics.observe_connect(_label(self.host, self.port, self.default_port), self._fetch_dns, elapsed - (self._fetch_dns or 0.0))
+
+	def _new_conn(self):
+
+		if getattr(_current, "metrics", None) is None: return super()._new_conn()
+
+		# resolving the host apart relies on urllib3 2.x: with another 
+		# version, the connection is opened as is and only timed in full
+		if NameResolutionError is None or not hasattr(self, "_dns_host"): return super()._new_conn()
+
+		# the host is resolved here, to be timed apart, then every address is
+		# tried in turn, as urllib3 does
+		started = time.perf_counter()
+
+		try:
+			addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+		except socket.gaierror as error:
+			raise NameResolutionError(self.host, self, error) from error
+
+		self._fetch_dns = time.perf_counter() - started
+
+		host, failure = self._dns_host, None
+
+		try:
+			for *_, address in addresses:
+				self._dns_host = address[0]
+
+				try:
+					return super()._new_conn()
+				except (ConnectTimeoutError, NewConnectionError) as error:
+					failure = error
+
+			raise failure
+		finally:
+			self._dns_host = host
+
+class _TimedHTTPConnection(_TimedMixin, HTTPConnection):
+	pass
+
+class _TimedHTTPSConnection(_TimedMixin, HTTPSConnection):
+	pass
+
+class _AbortableHTTPConnectionPool(_AbortableMixin, HTTPConnectionPool):
+	ConnectionCls = _TimedHTTPConnection
+
+class _AbortableHTTPSConnectionPool(_AbortableMixin, HTTPSConnectionPool):
+	ConnectionCls = _TimedHTTPSConnection
+
+class _AbortableAdapter(HTTPAdapter):
+
+	def init_poolmanager(self, *args, **kwargs):
+		super().init_poolmanager(*args, **kwargs)
+
+		self.poolmanager.pool_classes_by_scheme = {
+			"http": _AbortableHTTPConnectionPool,
+			"https": _AbortableHTTPSConnectionPool,
+		}
+
+
+
+class _Pool:
+	"""
+	The keep-alive session of one origin (scheme + host + port).
+	"""
+
+	__slots__ = ("session", "last_used", "active")
+
+	def __init__(self, session: requests.Session):
+		self.session = session
+		self.last_used = time.monotonic()
+		self.active = 0
+
+
+class Client:
+	"""
+	A scope for the connections opened by fetch().
+
+	A Client keeps one requests.Session per origin, whose connections are
+	reused by every request with the keepalive option. Sessions unused for
+	idle_timeout seconds are closed. A Client can be used as a context
+	manager, its sessions are closed on exit.
+
+	Responses are stored in the HTTPCache of the Client, following the
+	cache option of every fetch().
+
+	With coalesce, identical GET and HEAD requests in flight at the same
+	time share one network request.
+
+	The requests are sent by the transport of the Client: by default with
+	requests, through the sessions above, or e.g. with an AsyncioTransport
+	holding no thread per request.
+
+	With a rate_limit, requests over the limit wait in its queue, without
+	holding a thread, before being sent.
+
+	With metrics, the transport and the connection pools record the timings,
+	sizes and statuses of the requests, see fetch.metrics.FetchMetrics.
+	"""
+
+	def __init__(self, max_connections_per_host: int = 10, idle_timeout: float = 60.0, block: bool = True, cache: HTTPCache|bool = True, buffer_limit: int = 64 * 1024, coalesce: SingleFlight|bool = False, transport: Transport|None = None, rate_limit: RateLimiter|None = None, metrics: FetchMetrics|bool = False):
+		"""
+		Args:
+			max_connections_per_host: The maximum number of connections kept open to an origin.
+			idle_timeout: The number of seconds after which an unused session is closed.
+			block: If True, a request waits for a free connection when the origin
+				already has max_connections_per_host in use, instead of opening
+				an extra connection that will not be kept.
+			cache: The HTTPCache of the Client; True for an in-memory HTTPCache,
+				False or None to disable caching.
+			buffer_limit: Bodies announcing a Content-Length up to this size are
+				read right away, releasing their connection; larger or chunked
+				bodies are streamed and hold their connection until consumed
+				or closed.
+			coalesce: The SingleFlight coalescing the requests of the Client;
+				True for a new SingleFlight, False or None to send every
+				request.
+			transport: The Transport sending the requests, a RequestsTransport
+				by default.
+			rate_limit: The RateLimiter every request goes through before
+				being sent, e.g. a TokenBucket for the Client or a PerHost.
+			metrics: The FetchMetrics recording the requests of the Client;
+				True for a new FetchMetrics, False or None for no metrics.
+		"""
+
+		self.max_connections_per_host = max_connections_per_host
+		self.idle_timeout = idle_timeout
+		self.block = block
+		self.buffer_limit = buffer_limit
+
+		if cache is True: cache = HTTPCache()
+		self.cache = cache or None
+
+		if coalesce is True: coalesce = SingleFlight()
+		self.coalesce = coalesce or None
+
+		self.transport = transport if transport is not None else RequestsTransport()
+		self.rate_limit = rate_limit
+
+		if metrics is True: metrics = FetchMetrics()
+		self.metrics = metrics or None
+
+		self.__lock = threading.Lock()
+		self.__pools: Dict[str, _Pool] = {}
+		self.__last_eviction = time.monotonic()
+		self.__closed = False
+
+	def __enter__(self) -> 'Client':
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+	#--------------------------------------------------------------------------------
+	#--->> Private methods
+
+	def __new_session(self) -> requests.Session:
+
+		adapter = _AbortableAdapter(
+			pool_connections=1, #-> one origin per session
+			pool_maxsize=self.max_connections_per_host,
+			pool_block=self.block
+		)
+
+		session = requests.Session()
+		session.headers["Accept-Encoding"] = ACCEPT_ENCODING #-> only the codings the Response decodes
+		session.mount("http://", adapter)
+		session.mount("https://", adapter)
+
+		return session
+
+	def __evict(self, now: float) -> None:
+		# must be called with the lock held
+		for origin, pool in list(self.__pools.items()):
+			if not pool.active and now - pool.last_used > self.idle_timeout:
+				del self.__pools[origin]
+				pool.session.close()
+
+		self.__last_eviction = now
+
+	def __checkout(self, origin: str) -> _Pool:
+
+		now = time.monotonic()
+
+		with self.__lock:
+
+			if self.__closed: raise RuntimeError("the Client is closed")
+
+			# the scan is cheap but needless on every request
+			if now - self.__last_eviction > self.idle_timeout / 2: self.__evict(now)
+
+			pool = self.__pools.get(origin)
+
+			if pool is None:
+				pool = self.__pools[origin] = _Pool(self.__new_session())
+
+			pool.active += 1
+			pool.last_used = now
+
+		return pool
+
+	def __checkin(self, pool: _Pool) -> None:
+		with self.__lock:
+			pool.active -= 1
+			pool.last_used = time.monotonic()
+
+	#--------------------------------------------------------------------------------
+	#--->> Public methods
+
+	def request(self, method: str, url: str, keepalive: bool = True, signal: AbortSignal|None = None, **kwargs) -> requests.Response:
+		"""Send a request through the pooled session of its origin.
+
+		Args:
+			method: The HTTP method.
+			url: The URL to request.
+			keepalive: If False, the connection is closed after the response
+				instead of going back to the pool.
+			signal: An AbortSignal; when it aborts, the socket of the request
+				is shut down, failing the request or the read of its body.
+			**kwargs: The keyword arguments of requests.Session.request.
+
+		Returns:
+			The requests.Response.
+		"""
+
+		parts = urlsplit(url)
+		pool = self.__checkout(f"{parts.scheme}://{parts.netloc}".lower())
+
+		if not keepalive:
+			kwargs["headers"] = {**(kwargs.get("headers") or {}), "Connection": "close"}
+
+		previous = getattr(_current, "signal", None), getattr(_current, "metrics", None)
+		_current.signal, _current.metrics = signal, self.metrics
+
+		try:
+			return pool.session.request(method, url, **kwargs)
+		finally:
+			_current.signal, _current.metrics = previous
+			self.__checkin(pool)
+
+	def fetch(self, url: str, options: dict = {}) -> Promise:
+		"""Fetch a URL through the connections of this Client.
+
+		Args:
+			url: The URL to fetch.
+			options: A dictionary of options, see fetch.fetch.
+
+		Returns:
+			A Promise of the Response.
+		"""
+
+		from fetch.fetch import fetch #-> fetch.fetch imports this module
+		return fetch(url, options, client=self)
+
+	def evict_idle(self) -> None:
+		"""Close now the sessions unused for more than idle_timeout seconds."""
+
+		with self.__lock:
+			self.__evict(time.monotonic())
+
+	def close(self) -> None:
+		"""Close every pooled connection. The Client can not be used anymore."""
+
+		with self.__lock:
+			self.__closed = True
+			pools = list(self.__pools.values())
+			self.__pools.clear()
+
+		for pool in pools:
+			pool.session.close()
+
+		self.transport.close()
+
+
+#--------------------------------------------------------------------------------
+#--->> Default client
+
+_default_client: Client|None = None
+_default_lock = threading.Lock()
+
+def get_client() -> Client:
+	"""
+	Returns:
+		The Client used by fetch() when no client is given, created on first use.
+	"""
+
+	global _default_client
+
+	if _default_client is None:
+		with _default_lock:
+			if _default_client is None:
+				_default_client = Client()
+
+	return _default_client
+
+def set_client(client: Client|None) -> None:
+	"""
+	Args:
+		client: The Client to be used by fetch() when no client is given.
+			None restores a default Client on next use.
+	"""
+
+	global _default_client
+
+	with _default_lock:
+		_default_client = client
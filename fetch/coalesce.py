@@ -0,0 +1,112 @@
+import threading
+from typing import Callable, Dict
+
+from promise import AbortController, AbortSignal, Promise
+
+COALESCABLE_METHODS = frozenset(("GET", "HEAD"))
+
+
+class SingleFlight:
+	"""
+	Coalesce identical requests in flight: while a request is running, the
+	same request fetched again subscribes to it instead of going to the
+	network.
+
+	The shared response is buffered once, then every subscriber receives
+	its own clone of it, whose body it can read independently. The network
+	request is only aborted once every subscriber has cancelled.
+	"""
+
+	def __init__(self):
+		self.started = 0 #-> requests sent to the network
+		self.coalesced = 0 #-> requests answered by a request in flight
+
+		self.__lock = threading.Lock()
+		self.__flights: Dict[tuple, Promise] = {}
+
+	@staticmethod
+	def key(method: str, url: str, headers: dict, options: tuple = ()) -> tuple|None:
+		"""Returns: the key of a request, None if it can not be coalesced.
+
+		Args:
+			method: The HTTP method.
+			url: The URL of the request.
+			headers: The request headers, a dict or a Headers; the Vary
+				header of the response is only known once it arrives, so they
+				are all part of the key.
+			options: Other values which must be equal for two requests to be
+				coalesced, e.g. the cache and redirect modes.
+		"""
+
+		method = method.upper()
+		if method not in COALESCABLE_METHODS: return None
+
+		# any mapping, e.g. a fetch.Headers, as the transports accept it
+		headers = tuple(sorted((str(name).lower(), str(value)) for name, value in {**(headers or {})}.items()))
+
+		return (method, url, headers, options)
+
+	def __forget(self, key: tuple, promise: Promise) -> None:
+		with self.__lock:
+			if self.__flights.get(key) is promise: del self.__flights[key]
+
+	def subscribe(self, key: tuple, send: Callable[[AbortSignal], Promise]) -> Promise:
+		"""Join the request in flight for key, or start it.
+
+		Args:
+			key: The key of the request, see key().
+			send: A function sending the request with the signal aborting it,
+				returning a Promise of the Response.
+
+		Returns:
+			A Promise of a Response of its own; cancelling it leaves the
+			other subscribers unaffected.
+		"""
+
+		with self.__lock:
+
+			promise = self.__flights.get(key)
+			leader = promise is None
+
+			if leader:
+				controller = AbortController()
+
+				def oncancel(reason):
+					self.__forget(key, promise)
+					controller.abort(reason)
+
+				promise, resolve, reject = Promise.withResolvers(oncancel=oncancel)
+				self.__flights[key] = promise
+				self.started += 1
+
+			else:
+				self.coalesced += 1
+
+		subscription = promise.then(lambda response: response.clone())
+
+		if leader:
+			# sent outside of the lock, a transport may answer synchronously
+
+			def fulfilled(response):
+				self.__forget(key, promise) #-> later requests go to the network again
+
+				try:
+					template = response.clone() #-> buffers the body, once for all the clones
+				except BaseException as error:
+					reject(error)
+					return
+
+				resolve(template)
+
+			def rejected(reason):
+				self.__forget(key, promise)
+				reject(reason)
+
+			send(controller.signal).then(fulfilled, rejected)
+
+		return subscription
+
+	@property
+	def in_flight(self) -> int:
+		"""The number of distinct requests in flight."""
+		return len(self.__flights)
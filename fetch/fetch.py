@@ -1,7 +1,15 @@
-from typing import Any
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator
+from urllib.parse import urlsplit
+import itertools
+import threading
+import time
+from fetch.client import Client, get_client
+from fetch.metrics import host_label
+from fetch.Response.Decoder import read_content
 from fetch.Response.Response import Response
-from promise import Promise
-import requests
+from fetch.transport import _cancel_on_abort
+from promise import AbortSignal, Promise
 
 
 def _parse_parameter(options, parameter: Any) -> Any:
@@ -9,7 +17,8 @@ def _parse_parameter(options, parameter: Any) -> Any:
 	default_value = None
 
 	#>> default value switch
-	if parameter == "headers": default_value = {}
+	if parameter == "method": default_value = "GET"
+	elif parameter == "headers": default_value = {}
 	elif parameter == "body": default_value = None
 	elif parameter == "mode": default_value = "cors"
 	elif parameter == "credentials": default_value = "same-origin"
@@ -18,21 +27,30 @@ def _parse_parameter(options, parameter: Any) -> Any:
 	elif parameter == "referrer": default_value = "client"
 	elif parameter == "referrerPolicy": default_value = "no-referrer-when-downgrade"
 	elif parameter == "integrity": default_value = ""
-	elif parameter == "keepalive": default_value = False
+	elif parameter == "keepalive": default_value = True #-> reuse the pooled connections
 	elif parameter == "signal": default_value = None
+	elif parameter == "timeout": default_value = None #-> seconds, for the whole fetch
+	elif parameter == "connectTimeout": default_value = None
+	elif parameter == "readTimeout": default_value = None #-> between two bytes received
+	elif parameter == "retry": default_value = None #-> a RetryPolicy
+	elif parameter == "hedge": default_value = None #-> a HedgePolicy
 
 	return options[parameter] if parameter in options else default_value
 
 
-def _fetch(url: str, options: dict = {}):
+def _fetch(url: str, options: dict = {}, client: Client|None = None, release: Callable[[], None]|None = None) -> Response:
 	"""Fetch a URL and return the response body.
 
 	Args:
 		url: The URL to fetch.
 		options: A dictionary of options.
+		client: The Client whose pooled connections are used.
+		release: A function called once nothing is left to read from the
+			network: when the body has been read or closed, or right away if
+			the Response holds it in memory.
 
 	Returns:
-		The response body.
+		The Response.
 	"""
 
 	#>> requeired parameters
@@ -48,37 +66,366 @@ def _fetch(url: str, options: dict = {}):
 	integrity = _parse_parameter(options, "integrity")
 	keepalive = _parse_parameter(options, "keepalive")
 	signal = _parse_parameter(options, "signal")
-	
+	connect_timeout = _parse_parameter(options, "connectTimeout")
+	read_timeout = _parse_parameter(options, "readTimeout")
 
 	body = _parse_parameter(options, "body")
 	credentials = _parse_parameter(options, "credentials")
-	
-	requests_response = requests.request(
-		method=method,
-		url=url,
-		headers=headers,
-		data=body,
-		mode=mode,
-		credentials=credentials,
-		cache=cache,
-		redirect=redirect,
-		referrer=referrer,
-		referrerPolicy=referrerPolicy,
-		integrity=integrity,
-		keepalive=keepalive,
-		signal=signal
-	)
-
-	response = Response(requests_response)
-
-def fetch(url: str, options: dict = {}) -> Promise:
+
+	if client is None: client = get_client()
+	if signal is not None: signal.throw_if_aborted()
+
+	metrics = client.metrics
+	started = time.perf_counter()
+	ttfb = None #-> stays None for a response from the cache
+
+	def send(extra_headers: dict):
+		nonlocal ttfb
+
+		# mode, credentials, referrer, referrerPolicy and integrity only have 
+		# a meaning in a browser and are not sent
+		response = client.request(
+			method=method,
+			url=url,
+			keepalive=keepalive,
+			signal=signal,
+			headers={**headers, **extra_headers},
+			data=body,
+			allow_redirects=redirect == "follow",
+			timeout=(connect_timeout, read_timeout),
+			stream=True #-> the body is read by the Response, when consumed
+		)
+
+		ttfb = time.perf_counter() - started
+		return response
+
+	# only a lookup of the cache is a hit or a miss, not a request bypassing it
+	onlookup = (lambda hit: metrics.observe_cache(host_label(url), hit)) if metrics is not None else None
+
+	try:
+		if client.cache is not None:
+			requests_response = client.cache.handle(method, url, headers, cache, send, onlookup)
+		else:
+			requests_response = send({})
+	except Exception:
+		if metrics is not None: metrics.observe_failure(host_label(url), method.upper())
+
+		# the request failed because its socket was shut down by an abort
+		if signal is not None: signal.throw_if_aborted()
+		raise
+
+	if redirect == "error" and requests_response.is_redirect:
+		raise TypeError(f"Failed to fetch '{url}': unexpected redirect")
+
+	# a small body is read now, so that its connection goes back to the pool 
+	# even if the Response is never consumed
+	length = requests_response.headers.get("Content-Length", "")
+
+	if length.isascii() and length.isdecimal() and int(length) <= client.buffer_limit:
+		try:
+			read_content(requests_response)
+		except Exception:
+			if signal is not None: signal.throw_if_aborted()
+			raise
+
+	onend = None
+
+	if metrics is not None:
+		host = host_label(url)
+		raw = requests_response.raw #-> None for a response from the cache
+
+		sent = len(body.encode("utf-8")) if isinstance(body, str) else len(body) if isinstance(body, (bytes, bytearray)) else 0
+		metrics.observe_response(host, method.upper(), requests_response.status_code, ttfb, sent)
+
+		# the body is either read already, or observed once read by the Response
+		onend = lambda received: metrics.observe_body(host, received, time.perf_counter() - started)
+
+		if raw is not None and requests_response._content is not False:
+			onend(raw.tell())
+			onend = None
+		elif raw is None:
+			onend = None
+
+	if release is not None:
+		if requests_response.raw is None or requests_response._content is not False:
+			release()
+		else:
+			def onend(received: int, observe=onend) -> None:
+				if observe is not None: observe(received)
+				release()
+
+	return Response(requests_response, {
+		"status": requests_response.status_code,
+		"statusText": requests_response.reason,
+		# the headers of urllib3 keep repeated headers apart, e.g. Set-Cookie
+		"headers": getattr(requests_response.raw, "headers", None) or requests_response.headers,
+		"signal": signal,
+		"onend": onend
+	})
+
+def _send(url: str, options: dict, client: Client) -> Promise:
+	# a request over the rate limit waits for its turn, then goes to the transport
+
+	if client.rate_limit is None: return client.transport.send(url, options, client)
+
+	promise = client.rate_limit.acquire(urlsplit(url).netloc.lower()).then(lambda _: client.transport.send(url, options, client))
+
+	return _cancel_on_abort(promise, options.get("signal")) #-> leaves the queue
+
+def fetch(url: str, options: dict = {}, client: Client|None = None) -> Promise:
 	"""Fetch a URL and return the response body.
 
+	The fetch is aborted, and its socket shut down, when the signal option 
+	aborts, when the timeout option (in seconds) elapses, or when the 
+	returned Promise is cancelled. The abort also fails a later read of the 
+	body, the signal being followed until the body is read or closed; the 
+	timeout only runs until the Promise settles. The connectTimeout and 
+	readTimeout options bound the connection and every read from the socket.
+
+	With the retry option, a RetryPolicy, failed attempts are retried; with 
+	the hedge option, a HedgePolicy, slow attempts are raced against a copy, 
+	see fetch.retry.
+
+	If the Client coalesces requests, a GET or HEAD identical to one in 
+	flight shares its network request, see fetch.coalesce.SingleFlight.
+	If it has a rate limit, every request sent waits for its turn, see 
+	fetch.ratelimit.
+
 	Args:
 		url: The URL to fetch.
 		options: A dictionary of options.
+		client: The Client whose pooled connections are used, the
+			default Client if None.
 
 	Returns:
-		The response body.
+		A Promise of the Response, rejected with the reason of the abort: an 
+		AbortError, or a TimeoutError for the timeout option.
 	"""
-	return Promise(_fetch)
\ No newline at end of file
+
+	if client is None: client = get_client()
+
+	signal = _parse_parameter(options, "signal")
+	timeout = _parse_parameter(options, "timeout")
+
+	timer = None
+
+	if timeout is not None:
+		timer = AbortSignal.timeout(timeout)
+		signal = AbortSignal.any((signal, timer))
+
+	promise = _start(url, options, client, signal)
+
+	# the timer would otherwise hold the request until it expires
+	if timer is not None: promise.add_done_callback(lambda _: timer.clear_timeout())
+
+	return promise
+
+def _start(url: str, options: dict, client: Client, signal: AbortSignal|None) -> Promise:
+	# the fetch() options resolved to a retried, coalesced or plain request
+
+	retry = _parse_parameter(options, "retry")
+	hedge = _parse_parameter(options, "hedge")
+
+	if retry is not None or hedge is not None:
+		# every attempt is a plain fetch; the signal and the timeout bound 
+		# them all, waits included
+		single = {**options, "signal": None, "timeout": None, "retry": None, "hedge": None}
+		method = _parse_parameter(options, "method")
+
+		attempt = lambda: fetch(url, single, client)
+		if hedge is not None: attempt = lambda attempt=attempt: hedge.run(attempt, method)
+
+		if retry is not None and client.metrics is not None:
+			host, attempts, first = host_label(url), itertools.count(), attempt
+
+			def attempt():
+				if next(attempts): client.metrics.observe_retry(host)
+				return first()
+
+		promise = retry.run(attempt, method) if retry is not None else attempt()
+
+		return _cancel_on_abort(promise, signal)
+
+	if client.coalesce is not None and _parse_parameter(options, "body") is None:
+
+		key = client.coalesce.key(
+			_parse_parameter(options, "method"),
+			url,
+			_parse_parameter(options, "headers"),
+			tuple(_parse_parameter(options, name) for name in ("cache", "redirect", "connectTimeout", "readTimeout"))
+		)
+
+		if key is not None:
+			# the shared request has a signal of its own: aborting this fetch 
+			# only cancels its subscription
+			shared = {**options, "timeout": None}
+
+			promise = client.coalesce.subscribe(key, lambda shared_signal: _send(url, {**shared, "signal": shared_signal}, client))
+
+			return _cancel_on_abort(promise, signal)
+
+	return _send(url, {**options, "signal": signal}, client)
+
+
+class _Request:
+	"""
+	A request of fetch_many(): waiting in the queue of its host until 
+	promise, the fetch sending it, is started.
+	"""
+
+	__slots__ = ("url", "options", "resolve", "reject", "promise", "cancelled")
+
+	def __init__(self, url: str, options: dict):
+		self.url = url
+		self.options = options
+		self.resolve = self.reject = None
+		self.promise: Promise|None = None
+		self.cancelled = None #-> the reason of the cancellation, if any
+
+
+class _Dispatcher:
+	"""
+	Start queued requests as soon as a global slot and a slot of their host 
+	are free. Nothing waits on a thread: a request settling frees its slots 
+	and starts the next ones.
+	"""
+
+	def __init__(self, concurrency: int, per_host: int, client: Client|None):
+		self.concurrency = concurrency
+		self.per_host = per_host
+		self.client = client
+
+		self.__lock = threading.Lock()
+		self.__active = 0
+		self.__host_active: Dict[str, int] = {}
+		self.__queues: Dict[str, deque] = {} #-> host: waiting requests
+		self.__ready = deque() #-> hosts with waiting requests and a free slot, round robin
+		self.__is_ready = set()
+
+	def __mark_ready(self, host: str) -> None:
+		# must be called with the lock held
+		if host not in self.__is_ready and self.__queues.get(host) and self.__host_active.get(host, 0) < self.per_host:
+			self.__is_ready.add(host)
+			self.__ready.append(host)
+
+	def __pump(self) -> None:
+
+		starting = []
+
+		with self.__lock:
+			while self.__active < self.concurrency and self.__ready:
+
+				host = self.__ready.popleft()
+				self.__is_ready.discard(host)
+
+				# its requests may have been cancelled meanwhile
+				if not self.__queues.get(host): continue
+
+				starting.append((host, self.__queues[host].popleft()))
+
+				self.__active += 1
+				self.__host_active[host] = self.__host_active.get(host, 0) + 1
+
+				self.__mark_ready(host)
+
+		for host, request in starting:
+			request.promise = promise = fetch(request.url, request.options, self.client)
+
+			promise.then(
+				lambda response, host=host, resolve=request.resolve: self.__finish(host, resolve, response),
+				lambda reason, host=host, reject=request.reject: self.__finish(host, reject, reason)
+			)
+
+			# cancelled while starting: see __cancel()
+			if request.cancelled is not None: promise.cancel(request.cancelled)
+
+	def __finish(self, host: str, settle, value: Any) -> None:
+
+		with self.__lock:
+			self.__active -= 1
+			self.__host_active[host] -= 1
+			self.__mark_ready(host)
+
+		settle(value)
+		self.__pump()
+
+	def __cancel(self, host: str, request: _Request, reason: Any) -> None:
+
+		request.cancelled = reason
+
+		with self.__lock:
+			try:
+				# still queued: it is never sent
+				self.__queues[host].remove(request)
+				return
+			except (KeyError, ValueError):
+				pass
+
+		# started: the fetch is aborted, which frees its slots
+		if request.promise is not None: request.promise.cancel(reason)
+
+	def close(self) -> None:
+		# the requests still queued are never sent
+		with self.__lock:
+			self.__queues.clear()
+			self.__ready.clear()
+			self.__is_ready.clear()
+
+	def submit(self, url: str, options: dict) -> Promise:
+
+		host = urlsplit(url).netloc.lower()
+		request = _Request(url, options)
+
+		promise, request.resolve, request.reject = Promise.withResolvers(oncancel=lambda reason: self.__cancel(host, request, reason))
+
+		with self.__lock:
+			self.__queues.setdefault(host, deque()).append(request)
+			self.__mark_ready(host)
+
+		self.__pump()
+
+		return promise
+
+
+def fetch_many(requests: Iterable, concurrency: int = 16, per_host: int = 6, client: Client|None = None, as_completed: bool = False) -> Promise|Iterator[Promise]:
+	"""Fetch a batch of URLs with bounded concurrency.
+
+	Requests wait in a queue and are started as the previous ones settle, 
+	never more than concurrency at once and never more than per_host at once 
+	for the same host, hosts being served in turn.
+
+	Args:
+		requests: An iterable of URLs, or of (url, options) tuples.
+		concurrency: The maximum number of requests in flight.
+		per_host: The maximum number of requests in flight to the same host.
+		client: The Client whose pooled connections are used.
+		as_completed: If True, return an iterator of the settled Promises of 
+			the Responses in completion order instead of a single Promise.
+
+	Returns:
+		A Promise of the list of Responses, in the order of the requests, 
+		rejected with the first failure; or an as-completed iterator. 
+		Cancelling the Promise, or one of the iterator, cancels the requests 
+		still queued or in flight; so does the first failure, without 
+		as_completed.
+	"""
+
+	if concurrency <= 0 or per_host <= 0:
+		raise ValueError("concurrency and per_host must be greater than 0")
+
+	dispatcher = _Dispatcher(concurrency, per_host, client)
+	promises = []
+
+	for request in requests:
+		url, options = (request, {}) if isinstance(request, str) else request
+		promises.append(dispatcher.submit(url, options))
+
+	if as_completed: return Promise.as_completed(promises)
+
+	result = Promise.all(promises)
+
+	# called as the batch settles, before the requests in flight are 
+	# cancelled: the next ones in the queue must not start meanwhile
+	result.add_done_callback(lambda _: dispatcher.close())
+
+	return result
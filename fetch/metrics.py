@@ -0,0 +1,262 @@
+import bisect
+import math
+import threading
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+# the default buckets of the Prometheus clients, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def host_label(url: str) -> str:
+	"""Returns: the host of a URL as labelled in the metrics, with its port
+	unless it is the default one of the scheme."""
+
+	parts = urlsplit(url)
+	host = (parts.hostname or "").lower()
+
+	try:
+		port = parts.port
+	except ValueError:
+		port = None
+
+	return host if port is None or port == _DEFAULT_PORTS.get(parts.scheme.lower()) else f"{host}:{port}"
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _escape_help(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+	pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+	if extra: pairs.append(extra)
+
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+	if value == math.inf: return "+Inf"
+	return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+	"""
+	A monotonic counter per combination of label values.
+	"""
+
+	kind = "counter"
+
+	def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], lock: threading.Lock):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+
+		self.__lock = lock
+		self.__values: Dict[tuple, float] = {}
+
+	def inc(self, labels: tuple = (), amount: float = 1) -> None:
+		"""Add amount to the counter of the given label values."""
+
+		with self.__lock:
+			self.__values[labels] = self.__values.get(labels, 0) + amount
+
+	def get(self, labels: tuple = ()) -> float:
+		"""Returns: the counter of the given label values."""
+		return self.__values.get(labels, 0)
+
+	def render(self) -> List[str]:
+		with self.__lock:
+			values = sorted(self.__values.items())
+
+		return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+	def snapshot(self) -> dict:
+		with self.__lock:
+			return { labels: value for labels, value in self.__values.items() }
+
+
+class Histogram:
+	"""
+	A distribution of observations per combination of label values, counted
+	in cumulative buckets as Prometheus expects.
+	"""
+
+	kind = "histogram"
+
+	def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], lock: threading.Lock, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(sorted(buckets))
+
+		self.__lock = lock
+		self.__values: Dict[tuple, list] = {} #-> [counts per bucket, sum, count]
+
+	def observe(self, labels: tuple, value: float) -> None:
+		"""Add an observation to the distribution of the given label values."""
+
+		index = bisect.bisect_left(self.buckets, value) #-> the first bucket whose bound is >= value
+
+		with self.__lock:
+			state = self.__values.get(labels)
+			if state is None: state = self.__values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+			state[0][index] += 1
+			state[1] += value
+			state[2] += 1
+
+	def render(self) -> List[str]:
+		with self.__lock:
+			values = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self.__values.items())
+
+		lines = []
+
+		for labels, (counts, total, count) in values:
+			cumulated = 0
+
+			for bound, bucket in zip((*self.buckets, math.inf), counts):
+				cumulated += bucket
+				le = 'le="' + _format_value(bound) + '"'
+				lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulated}")
+
+			lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+			lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+
+		return lines
+
+	def snapshot(self) -> dict:
+		with self.__lock:
+			return {
+				labels: {"count": count, "sum": total, "buckets": dict(zip((*self.buckets, math.inf), counts))}
+				for labels, (counts, total, count) in self.__values.items()
+			}
+
+
+class MetricsRegistry:
+	"""
+	A set of counters and histograms, rendered in the Prometheus text
+	exposition format by render(), e.g. to be served on /metrics, or as a
+	dictionary by snapshot().
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock() #-> shared by the metrics: every update is a few instructions
+		self.__metrics: Dict[str, Counter|Histogram] = {}
+
+	def __register(self, metric: Counter|Histogram) -> Counter|Histogram:
+		if metric.name in self.__metrics: raise ValueError(f"A metric named {metric.name!r} is already registered")
+
+		self.__metrics[metric.name] = metric
+		return metric
+
+	def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+		"""Returns: a new Counter, registered under the given name."""
+		return self.__register(Counter(name, help, labelnames, self.__lock))
+
+	def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+		"""Returns: a new Histogram, registered under the given name."""
+		return self.__register(Histogram(name, help, labelnames, self.__lock, buckets))
+
+	def render(self) -> str:
+		"""Returns: the metrics in the Prometheus text exposition format (version 0.0.4)."""
+
+		lines = []
+
+		for metric in self.__metrics.values():
+			lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+			lines.append(f"# TYPE {metric.name} {metric.kind}")
+			lines.extend(metric.render())
+
+		return "\n".join(lines) + "\n"
+
+	def snapshot(self) -> Dict[str, dict]:
+		"""Returns: the metrics by name, then by label values joined with ',' (e.g. 'example.com,GET,2xx')."""
+
+		return {
+			name: { ",".join(map(str, labels)): value for labels, value in metric.snapshot().items() }
+			for name, metric in self.__metrics.items()
+		}
+
+
+class FetchMetrics(MetricsRegistry):
+	"""
+	The metrics of the requests of a Client, labelled by host: its transport
+	and its connection pools record them as requests are sent, see
+	Client(metrics=...).
+
+	Latencies are per attempt, so a retried fetch is observed once per
+	attempt. An attempt is observed once, by its final response, with the
+	host and method of the fetch: the redirects it followed, and a 304
+	refreshing a cached response, are not counted, whatever the transport.
+	The byte counters count the bodies as sent and received on the
+	wire, before content decoding.
+	"""
+
+	def __init__(self, prefix: str = "fetch", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+		"""
+		Args:
+			prefix: The prefix of the metric names.
+			buckets: The bounds, in seconds, of the buckets of the latency histograms.
+		"""
+
+		super().__init__()
+
+		self.requests = self.counter(f"{prefix}_requests_total", "Requests answered, by status class, or failed (error).", ("host", "method", "status"))
+		self.dns = self.histogram(f"{prefix}_dns_seconds", "Time spent resolving the host of new connections.", ("host",), buckets)
+		self.connect = self.histogram(f"{prefix}_connect_seconds", "Time spent opening new connections, TLS handshake included.", ("host",), buckets)
+		self.pool_wait = self.histogram(f"{prefix}_pool_wait_seconds", "Time spent waiting for a connection of the pool.", ("host",), buckets)
+		self.ttfb = self.histogram(f"{prefix}_ttfb_seconds", "Time from sending a request to its response headers.", ("host",), buckets)
+		self.duration = self.histogram(f"{prefix}_request_duration_seconds", "Time from sending a request to the end of its response body.", ("host",), buckets)
+		self.connections = self.counter(f"{prefix}_connections_total", "Connections used by requests, new or reused from the pool.", ("host", "reused"))
+		self.sent_bytes = self.counter(f"{prefix}_sent_bytes_total", "Bytes of request bodies sent.", ("host",))
+		self.received_bytes = self.counter(f"{prefix}_received_bytes_total", "Bytes of response bodies received, before decoding.", ("host",))
+		self.retries = self.counter(f"{prefix}_retries_total", "Attempts sent by a RetryPolicy after the first one.", ("host",))
+		self.cache = self.counter(f"{prefix}_cache_total", "Lookups of the HTTPCache, answered from it (hit) or by the network (miss).", ("host", "result"))
+
+	@staticmethod
+	def status_class(status: int) -> str:
+		return f"{status // 100}xx" if 100 <= status < 600 else "other"
+
+	def observe_connection(self, host: str, reused: bool, pool_wait: float) -> None:
+		"""Record a connection taken from the pool for a request."""
+		self.connections.inc((host, "true" if reused else "false"))
+		self.pool_wait.observe((host,), pool_wait)
+
+	def observe_connect(self, host: str, dns: float|None, connect: float) -> None:
+		"""Record the opening of a new connection."""
+		if dns is not None: self.dns.observe((host,), dns)
+		self.connect.observe((host,), connect)
+
+	def observe_response(self, host: str, method: str, status: int, ttfb: float|None, sent: int) -> None:
+		"""Record the headers of a response; ttfb is None for a cached one."""
+		self.requests.inc((host, method, self.status_class(status)))
+		if ttfb is not None: self.ttfb.observe((host,), ttfb)
+		if sent: self.sent_bytes.inc((host,), sent)
+
+	def observe_body(self, host: str, received: int, duration: float) -> None:
+		"""Record the end of a response body read from the network."""
+		if received: self.received_bytes.inc((host,), received)
+		self.duration.observe((host,), duration)
+
+	def observe_failure(self, host: str, method: str) -> None:
+		"""Record a request which failed without response."""
+		self.requests.inc((host, method, "error"))
+
+	def observe_retry(self, host: str) -> None:
+		self.retries.inc((host,))
+
+	def observe_cache(self, host: str, hit: bool) -> None:
+		self.cache.inc((host, "hit" if hit else "miss"))
+
+	def reuse_ratio(self, host: str|None = None) -> float:
+		"""Returns: the share of requests sent on a reused connection, for a host or overall."""
+
+		counts = self.connections.snapshot()
+
+		reused = sum(count for (label, flag), count in counts.items() if flag == "true" and host in (None, label))
+		total = sum(count for (label, flag), count in counts.items() if host in (None, label))
+
+		return reused / total if total else 0.0
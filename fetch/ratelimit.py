@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from promise import Promise, get_scheduler
+
+
+class RateLimitExceeded(Exception):
+	"""
+	Raised when a request finds the queue of a rate limiter full.
+	"""
+
+
+class RateLimiter:
+	"""
+	Base class of the rate limiters of a Client: acquire() returns a Promise
+	fulfilled when a request may be sent. Waiting requests are parked in a
+	queue and woken by a timer of the scheduler, no thread sleeps.
+	"""
+
+	def acquire(self, key: str) -> Promise:
+		"""Wait for the permission to send a request.
+
+		Args:
+			key: The host of the request.
+
+		Returns:
+			A Promise fulfilled with None once the request may be sent, or
+			rejected with RateLimitExceeded. Cancelling it leaves the queue.
+		"""
+		raise NotImplementedError
+
+
+class TokenBucket(RateLimiter):
+	"""
+	A token bucket: tokens are added at rate per second, up to burst, and
+	every request takes one, waiting in FIFO order when there is none. The
+	throughput sits at rate, after a burst of up to burst requests.
+	"""
+
+	def __init__(self, rate: float, burst: int = 1, max_queue: int|None = None):
+		"""
+		Args:
+			rate: The number of requests allowed per second.
+			burst: The number of requests which can be sent at once after an
+				idle period, the size of the bucket.
+			max_queue: The maximum number of waiting requests; further ones are
+				rejected with RateLimitExceeded. None for no limit.
+		"""
+
+		if rate <= 0 or burst < 1: raise ValueError("rate must be greater than 0 and burst at least 1")
+
+		self.rate = rate
+		self.burst = burst
+		self.max_queue = max_queue
+
+		self.granted = 0
+		self.rejected = 0
+		self.max_queue_depth = 0
+		self.total_wait = 0.0 #-> seconds waited by the granted requests
+
+		self.__lock = threading.Lock()
+		self.__tokens = float(burst)
+		self.__updated = time.monotonic()
+		self.__queue = deque() #-> [resolve, enqueued at]
+		self.__timer = None
+
+	def __refill(self, now: float) -> None:
+		# must be called with the lock held
+		self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+		self.__updated = now
+
+	def __arm(self) -> None:
+		# must be called with the lock held: one timer per bucket, whatever the queue depth
+		if self.__timer is None and self.__queue:
+			self.__timer = get_scheduler().call_later(max(0.0, (1 - self.__tokens) / self.rate), self.__drain)
+
+	def __drain(self) -> None:
+
+		granted = []
+
+		with self.__lock:
+			self.__timer = None
+
+			now = time.monotonic()
+			self.__refill(now)
+
+			while self.__queue and self.__tokens >= 1:
+				resolve, enqueued = self.__queue.popleft()
+
+				self.__tokens -= 1
+				self.granted += 1
+				self.total_wait += now - enqueued
+
+				granted.append(resolve)
+
+			self.__arm()
+
+		for resolve in granted: resolve(None)
+
+	def __leave(self, entry: list) -> None:
+		with self.__lock:
+			try: self.__queue.remove(entry)
+			except ValueError: pass #-> already granted
+
+	@property
+	def queue_depth(self) -> int:
+		"""The number of requests waiting."""
+		return len(self.__queue)
+
+	@property
+	def mean_wait(self) -> float:
+		"""The mean number of seconds waited by the granted requests."""
+		return self.total_wait / self.granted if self.granted else 0.0
+
+	def acquire(self, key: str|None = None) -> Promise:
+
+		with self.__lock:
+			self.__refill(time.monotonic())
+
+			if not self.__queue and self.__tokens >= 1:
+				self.__tokens -= 1
+				self.granted += 1
+				return Promise.resolve(None)
+
+			if self.max_queue is not None and len(self.__queue) >= self.max_queue:
+				self.rejected += 1
+				return Promise.reject(RateLimitExceeded(f"{len(self.__queue)} requests already waiting for {key or 'the rate limiter'}"))
+
+			entry = [None, self.__updated]
+			promise, entry[0], _ = Promise.withResolvers(oncancel=lambda reason: self.__leave(entry))
+
+			self.__queue.append(entry)
+			self.max_queue_depth = max(self.max_queue_depth, len(self.__queue))
+
+			self.__arm()
+
+		return promise
+
+
+class LeakyBucket(TokenBucket):
+	"""
+	A leaky bucket: requests queue up to capacity and leave at a constant
+	rate, one every 1/rate seconds, without bursts. Requests overflowing the
+	bucket are rejected with RateLimitExceeded.
+	"""
+
+	def __init__(self, rate: float, capacity: int|None = None):
+		"""
+		Args:
+			rate: The number of requests allowed per second.
+			capacity: The maximum number of waiting requests, None for no limit.
+		"""
+		super().__init__(rate, burst=1, max_queue=capacity)
+
+
+class PerHost(RateLimiter):
+	"""
+	A rate limiter per host, e.g. for a Client calling several APIs with
+	different limits:
+
+		PerHost({"api.example.com": TokenBucket(10, burst=20)})
+		PerHost(lambda host: TokenBucket(5))
+	"""
+
+	def __init__(self, limits: Dict[str, RateLimiter]|Callable[[str], RateLimiter|None]):
+		"""
+		Args:
+			limits: The rate limiters by host (as in the URL, with the port if
+				any), or a function creating the rate limiter of a host, once,
+				None for no limit. Hosts without rate limiter are not limited.
+		"""
+
+		self.__lock = threading.Lock()
+		self.__factory = limits if callable(limits) else None
+		self.__limits: Dict[str, RateLimiter|None] = {} if callable(limits) else { host.lower(): limiter for host, limiter in limits.items() }
+
+	def limiter(self, host: str) -> RateLimiter|None:
+		"""Returns: the rate limiter of a host, None if it is not limited."""
+
+		host = host.lower()
+		limiter = self.__limits.get(host)
+
+		if limiter is None and self.__factory is not None:
+			with self.__lock:
+				if host not in self.__limits: self.__limits[host] = self.__factory(host)
+				limiter = self.__limits[host]
+
+		return limiter
+
+	def acquire(self, key: str) -> Promise:
+		limiter = self.limiter(key)
+		return limiter.acquire(key) if limiter is not None else Promise.resolve(None)
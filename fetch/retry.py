@@ -0,0 +1,423 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, List
+
+import requests
+
+from promise import AbortError, Promise, get_scheduler
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-9.2.2
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"))
+
+RETRY_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+# failures of the network, which a new attempt may not meet
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def _parse_retry_after(value: str|None) -> float|None:
+	if not value: return None
+
+	value = value.strip()
+	if value.isascii() and value.isdigit(): return float(value)
+
+	try:
+		return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+
+class RetryBudget:
+	"""
+	A limit on the share of retries among requests, so that retries can not
+	multiply the load of a struggling backend: over the last window seconds,
+	at most ratio retries per request, plus min_per_second retries per second
+	for low traffic. A budget is meant to be shared by the policies of the
+	requests to the same backend.
+	"""
+
+	def __init__(self, ratio: float = 0.2, min_per_second: float = 10.0, window: float = 10.0):
+		"""
+		Args:
+			ratio: The number of retries allowed per request.
+			min_per_second: The number of retries always allowed per second.
+			window: The number of seconds the requests and retries are counted for.
+		"""
+
+		self.ratio = ratio
+		self.min_per_second = min_per_second
+		self.window = window
+
+		self.__lock = threading.Lock()
+		self.__requests = deque() #-> timestamps
+		self.__retries = deque()
+
+	def __trim(self, now: float) -> None:
+		# must be called with the lock held
+		horizon = now - self.window
+
+		while self.__requests and self.__requests[0] < horizon: self.__requests.popleft()
+		while self.__retries and self.__retries[0] < horizon: self.__retries.popleft()
+
+	def record_request(self) -> None:
+		"""Count a first attempt, which earns ratio retries."""
+
+		now = time.monotonic()
+
+		with self.__lock:
+			self.__trim(now)
+			self.__requests.append(now)
+
+	def try_retry(self) -> bool:
+		"""Returns: True if a retry is allowed, counting it, False if the budget is spent."""
+
+		now = time.monotonic()
+
+		with self.__lock:
+			self.__trim(now)
+
+			if len(self.__retries) >= self.min_per_second * self.window + self.ratio * len(self.__requests):
+				return False
+
+			self.__retries.append(now)
+			return True
+
+
+class RetryPolicy:
+	"""
+	When and how fast to retry a fetch: after a network failure or a
+	retryable status, only for idempotent methods, with an exponential
+	backoff and full jitter, waiting for the Retry-After of the response if
+	any, and within a RetryBudget.
+
+	The waits are timers of the scheduler: no thread sleeps between two
+	attempts.
+	"""
+
+	def __init__(self, max_retries: int = 3, backoff: float = 0.1, max_backoff: float = 10.0, jitter: bool = True, statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS, exceptions: tuple = RETRY_EXCEPTIONS, max_retry_after: float = 60.0, budget: RetryBudget|None = None):
+		"""
+		Args:
+			max_retries: The maximum number of attempts after the first one.
+			backoff: The wait before the first retry, doubled for every next one.
+			max_backoff: The maximum wait between two attempts.
+			jitter: If True, the wait is drawn uniformly between 0 and the
+				backoff ("full jitter"), spreading the retries of many clients.
+			statuses: The response statuses which are retried.
+			methods: The methods which are retried: by default the idempotent
+				ones, as retrying a POST may apply it twice.
+			exceptions: The failures which are retried.
+			max_retry_after: A response asking, with Retry-After, to wait
+				longer than this many seconds is returned instead of retried.
+			budget: The RetryBudget the retries are taken from; a new
+				RetryBudget by default, shared by every fetch of the policy.
+		"""
+
+		self.max_retries = max_retries
+		self.backoff = backoff
+		self.max_backoff = max_backoff
+		self.jitter = jitter
+		self.statuses = frozenset(statuses)
+		self.methods = frozenset(method.upper() for method in methods)
+		self.exceptions = exceptions
+		self.max_retry_after = max_retry_after
+		self.budget = budget if budget is not None else RetryBudget()
+
+		self.retries = 0 #-> retries sent
+		self.exhausted = 0 #-> retries denied by the budget
+
+	def delay(self, retry: int, response: Any = None) -> float|None:
+		"""Returns: the number of seconds to wait before the given retry, None
+		if it should not be sent.
+
+		Args:
+			retry: The index of the retry.
+			response: The Response asking for a retry, if any.
+		"""
+
+		if retry >= self.max_retries: return None
+
+		wait = min(self.max_backoff, self.backoff * (2 ** retry))
+		if self.jitter: wait = random.uniform(0, wait)
+
+		if response is not None:
+			retry_after = _parse_retry_after(response.headers.get("retry-after"))
+
+			if retry_after is not None:
+				if retry_after > self.max_retry_after: return None
+				wait = max(wait, retry_after)
+
+		return wait
+
+	def run(self, attempt: Callable[[], Promise], method: str = "GET") -> Promise:
+		"""Run attempts until one succeeds or retrying is not allowed.
+
+		Args:
+			attempt: A function starting an attempt, returning a Promise of
+				a Response.
+			method: The HTTP method of the request.
+
+		Returns:
+			A Promise of the last Response, or rejected with the last failure.
+			Cancelling it cancels the attempt in flight.
+		"""
+		return _Retrier(self, attempt, method.upper() in self.methods).promise
+
+
+class _Retrier:
+
+	def __init__(self, policy: RetryPolicy, attempt: Callable[[], Promise], retryable: bool):
+		self.policy = policy
+		self.attempt = attempt
+		self.retryable = retryable
+		self.retry = 0
+
+		self.__lock = threading.Lock()
+		self.__cancelled = False
+		self.__current: Promise|None = None
+		self.__timer = None
+
+		self.promise, self.__resolve, self.__reject = Promise.withResolvers(oncancel=self.__cancel)
+
+		policy.budget.record_request()
+		self.__start()
+
+	def __start(self) -> None:
+
+		try:
+			with self.__lock:
+				if self.__cancelled: return
+				current = self.__current = self.attempt()
+		except Exception as error:
+			self.__reject(error)
+			return
+
+		current.then(self.__on_response, self.__on_failure)
+
+	def __schedule(self, delay: float|None) -> bool:
+
+		if delay is None or not self.retryable: return False
+
+		if not self.policy.budget.try_retry():
+			self.policy.exhausted += 1
+			return False
+
+		self.retry += 1
+		self.policy.retries += 1
+
+		with self.__lock:
+			if self.__cancelled: return True
+			self.__timer = get_scheduler().call_later(delay, self.__start)
+
+		return True
+
+	def __on_response(self, response) -> None:
+
+		# an error of the handler rejects the retried fetch, which would 
+		# otherwise stay pending forever
+		try:
+			if response.status in self.policy.statuses and self.__schedule(self.policy.delay(self.retry, response)):
+				response.close() #-> its connection goes back to the pool
+				return
+		except Exception as error:
+			response.close()
+			self.__reject(error)
+			return
+
+		self.__resolve(response)
+
+	def __on_failure(self, reason) -> None:
+
+		try:
+			if isinstance(reason, self.policy.exceptions) and self.__schedule(self.policy.delay(self.retry)): return
+		except Exception as error:
+			reason = error
+
+		self.__reject(reason)
+
+	def __cancel(self, reason) -> None:
+
+		with self.__lock:
+			self.__cancelled = True
+			current, timer = self.__current, self.__timer
+
+		if timer is not None: timer.cancel()
+		if current is not None: current.cancel(reason)
+
+
+class HedgePolicy:
+	"""
+	Hedged requests: when an idempotent fetch is still running after a delay,
+	a second copy of it is sent, and the first Response wins, the other copy
+	being cancelled. A few slow replicas then no longer make the tail latency.
+
+	The delay is fixed, or the given percentile of the latencies observed by
+	the policy, so that only the slowest requests are hedged: with the 95th
+	percentile, about 5% more requests are sent.
+	"""
+
+	def __init__(self, delay: float|None = None, percentile: float = 0.95, min_samples: int = 20, window: int = 1000, max_hedges: int = 1, methods=IDEMPOTENT_METHODS):
+		"""
+		Args:
+			delay: A fixed hedging delay in seconds; None to use the percentile.
+			percentile: The percentile, between 0 and 1, of the observed
+				latencies used as delay.
+			min_samples: The number of latencies observed before hedging with
+				the percentile; no request is hedged before.
+			window: The number of latest latencies kept.
+			max_hedges: The maximum number of copies sent besides the first request.
+			methods: The methods which are hedged, the idempotent ones by default.
+		"""
+
+		self.fixed_delay = delay
+		self.percentile = percentile
+		self.min_samples = min_samples
+		self.max_hedges = max_hedges
+		self.methods = frozenset(method.upper() for method in methods)
+
+		self.hedges = 0 #-> copies sent
+		self.wins = 0 #-> copies which answered first
+
+		self.__lock = threading.Lock()
+		self.__latencies = deque(maxlen=window)
+		self.__delay: float|None = None
+		self.__stale = 0 #-> latencies added since the delay was computed
+
+	def record(self, latency: float) -> None:
+		"""Add the latency, in seconds, of a successful attempt."""
+
+		with self.__lock:
+			self.__latencies.append(latency)
+			self.__stale += 1
+
+	def delay(self) -> float|None:
+		"""Returns: the hedging delay in seconds, None if not known yet."""
+
+		if self.fixed_delay is not None: return self.fixed_delay
+
+		with self.__lock:
+			if len(self.__latencies) < self.min_samples: return None
+
+			# sorting is only worth it once a tenth of the window has changed
+			if self.__delay is None or self.__stale * 10 >= self.__latencies.maxlen:
+				latencies = sorted(self.__latencies)
+				self.__delay = latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+				self.__stale = 0
+
+			return self.__delay
+
+	def run(self, attempt: Callable[[], Promise], method: str = "GET") -> Promise:
+		"""Run an attempt, and copies of it when it is slow.
+
+		Args:
+			attempt: A function starting an attempt, returning a Promise of
+				a Response.
+			method: The HTTP method of the request.
+
+		Returns:
+			A Promise of the first Response, or rejected with the last failure
+			once every attempt has failed. Cancelling it cancels every attempt.
+		"""
+
+		if method.upper() not in self.methods: return attempt()
+
+		return _Hedger(self, attempt).promise
+
+
+class _Hedger:
+
+	def __init__(self, policy: HedgePolicy, attempt: Callable[[], Promise]):
+		self.policy = policy
+		self.attempt = attempt
+
+		self.__lock = threading.Lock()
+		self.__attempts: List[Promise] = []
+		self.__failures = 0
+		self.__timer = None
+		self.__settled = False
+
+		self.promise, self.__resolve, self.__reject = Promise.withResolvers(oncancel=self.__cancel)
+
+		self.__start()
+
+	def __start(self) -> None:
+
+		with self.__lock:
+			if self.__settled: return
+
+			index = len(self.__attempts)
+			promise = self.attempt()
+			self.__attempts.append(promise)
+
+			delay = self.policy.delay() if index < self.policy.max_hedges else None
+			if delay is not None: self.__timer = get_scheduler().call_later(delay, self.__start)
+
+		if index: self.policy.hedges += 1
+
+		started = time.monotonic()
+
+		promise.then(
+			lambda response: self.__on_response(index, started, response),
+			lambda reason: self.__on_failure(reason)
+		)
+
+	def __finish(self) -> List[Promise]:
+		# must be called with the lock held; returns the attempts to cancel
+		self.__settled = True
+		if self.__timer is not None: self.__timer.cancel()
+
+		return list(self.__attempts)
+
+	def __on_response(self, index: int, started: float, response) -> None:
+
+		with self.__lock:
+			if self.__settled:
+				response.close() #-> a copy that lost the race
+				return
+
+			losers = self.__finish()
+
+		try:
+			self.policy.record(time.monotonic() - started)
+			if index: self.policy.wins += 1
+		finally:
+			self.__resolve(response)
+
+			for loser in losers: loser.cancel(AbortError("Lost the race to a hedged request"))
+
+	def __on_failure(self, reason) -> None:
+
+		try:
+			with self.__lock:
+				self.__failures += 1
+
+				# another attempt in flight may still succeed; otherwise no copy 
+				# is sent, retrying failures is the job of a RetryPolicy
+				if self.__settled or self.__failures < len(self.__attempts): return
+
+				self.__finish()
+		except Exception as error:
+			# an error of the handler rejects the hedged fetch, which would 
+			# otherwise stay pending forever
+			self.__abandon(error)
+			return
+
+		self.__reject(reason)
+
+	def __abandon(self, error: Exception) -> None:
+
+		with self.__lock:
+			attempts = self.__finish()
+
+		self.__reject(error)
+
+		for attempt in attempts: attempt.cancel(error)
+
+	def __cancel(self, reason) -> None:
+
+		with self.__lock:
+			attempts = self.__finish()
+
+		for attempt in attempts: attempt.cancel(reason)
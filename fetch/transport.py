@@ -0,0 +1,130 @@
+import threading
+from typing import Any, Callable, Tuple
+
+from fetch.Response.Headers import Headers
+from fetch.Response.Response import Response
+from promise import AbortController, AbortSignal, Promise
+
+
+def _cancel_on_abort(promise: Promise, signal: AbortSignal|None) -> Promise:
+	# the listener is removed once the Promise settles: a long-lived signal
+	# must not keep every finished request alive
+	if signal is not None:
+		signal.add_listener(promise.cancel)
+		promise.add_done_callback(lambda _: signal.remove_listener(promise.cancel))
+
+	return promise
+
+
+class Transport:
+	"""
+	What sends the requests of fetch() over the wire. A Client uses the
+	RequestsTransport unless it is given another one.
+
+	A transport implements send(), returning a Promise of the Response which
+	must be rejected with the reason of the signal of the request when it
+	aborts, and whose cancellation must stop the request.
+	"""
+
+	def send(self, url: str, options: dict, client: Any) -> Promise:
+		"""Send a request.
+
+		Args:
+			url: The URL of the request.
+			options: The options of fetch(); the signal option, if not None,
+				aborts the request.
+			client: The Client sending the request.
+
+		Returns:
+			A Promise of the Response.
+		"""
+		raise NotImplementedError
+
+	def close(self) -> None:
+		"""Release the connections of the transport."""
+
+
+class RequestsTransport(Transport):
+	"""
+	The default transport: requests are sent with requests, through the
+	pooled sessions and the HTTPCache of the Client, every request in flight
+	holding a worker of the scheduler.
+	"""
+
+	def send(self, url: str, options: dict, client: Any) -> Promise:
+
+		from fetch.fetch import _fetch #-> fetch.fetch imports this module
+
+		# the signal shuts down the socket of the request, cancelling the
+		# Promise must abort it too
+		controller = AbortController()
+
+		signal = options.get("signal")
+		release = None
+
+		if signal is not None:
+			signal.add_listener(controller.abort)
+
+			# followed until the request is done with: a streamed body can still 
+			# be aborted, and a long-lived signal keeps no finished request alive
+			release = lambda: signal.remove_listener(controller.abort)
+
+		options = {**options, "signal": controller.signal}
+
+		def executor(resolve, _):
+			try:
+				resolve(_fetch(url, options, client, release))
+			except BaseException:
+				if release is not None: release()
+				raise
+
+		return Promise(executor, signal=controller.signal, oncancel=controller.abort)
+
+
+class LoopbackTransport(Transport):
+	"""
+	An in-memory transport for tests: requests never leave the process, they
+	are answered by a handler called on a worker of the scheduler.
+
+	Usage:
+
+		def handler(method, url, headers, body):
+			return 200, {"Content-Type": "text/plain"}, b"hello"
+
+		client = Client(transport=LoopbackTransport(handler))
+	"""
+
+	def __init__(self, handler: Callable[[str, str, Headers, bytes|None], 'Response|Tuple[int, dict, bytes]']):
+		"""
+		Args:
+			handler: A function receiving the method, the URL, the Headers and
+				the body of a request, and returning a Response or a
+				(status, headers, body) tuple.
+		"""
+
+		self.handler = handler
+		self.requests = 0 #-> requests received
+
+		self.__lock = threading.Lock() #-> executors run on several workers
+
+	def send(self, url: str, options: dict, client: Any) -> Promise:
+
+		method = options.get("method", "GET").upper()
+		headers = Headers(options.get("headers") or {})
+		body = options.get("body")
+
+		if isinstance(body, str): body = body.encode()
+
+		def executor(resolve, _):
+			with self.__lock: self.requests += 1
+			response = self.handler(method, url, headers, body)
+
+			if not isinstance(response, Response):
+				status, response_headers, content = response
+				response = Response(content, {"status": status, "headers": response_headers, "url": url})
+
+			resolve(response)
+
+		signal: AbortSignal|None = options.get("signal")
+
+		return Promise(executor, signal=signal)
@@ -0,0 +1,7 @@
+from promise.promise import Promise, AggregateError, PromiseRejection
+from promise.scheduler import Scheduler, ImmediateScheduler, ThreadPoolScheduler, get_scheduler, set_scheduler
+from promise.tracing import Tracer, TraceCollector, get_tracer, set_tracer
+from promise.abort import AbortController, AbortError, AbortSignal
+from promise.memoize import memoize_promise
+from promise.awaiter import awaiter, wait_all, wait_any
+from promise.process import ProcessPool, get_process_pool, set_process_pool
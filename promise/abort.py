@@ -0,0 +1,199 @@
+import threading
+import traceback
+import weakref
+from typing import Any, Callable, Iterable, List
+
+from promise.scheduler import _timers
+
+
+class AbortError(Exception):
+	"""
+	The default reason of an aborted AbortSignal or a cancelled Promise.
+	"""
+
+
+class AbortSignal:
+	"""
+	The AbortSignal interface represents a signal object that allows you to
+	communicate with an asynchronous operation (such as a fetch request)
+	and abort it if required via an AbortController object.
+	"""
+
+	def __init__(self):
+		self.aborted = False
+		self.reason = None
+
+		self.__lock = threading.Lock()
+		self.__listeners: List[Callable[[Any], None]] = []
+		self.__sources: List[tuple] = [] #-> (signal, listener) followed by any()
+		self.__timer = None #-> the TimerHandle of timeout()
+
+	def _abort(self, reason: Any) -> None:
+		# called by the AbortController owning the signal
+		with self.__lock:
+			if self.aborted: return
+
+			self.aborted = True
+			self.reason = reason
+
+			listeners = self.__listeners
+			self.__listeners = []
+
+			sources = self.__sources
+			self.__sources = []
+
+		self.__timer = None
+
+		# an aborted signal has nothing left to follow
+		_detach(sources)
+
+		for listener in listeners:
+			try:
+				listener(reason)
+			except Exception:
+				traceback.print_exc()
+
+	def add_listener(self, listener: Callable[[Any], None]) -> None:
+		"""
+		Parameters
+		----------
+		listener : Callable[[Any], None]
+			A function called with the reason when the signal aborts, on the
+			thread calling abort(). If the signal is already aborted, it is
+			called right away.
+		"""
+
+		with self.__lock:
+			if not self.aborted:
+				self.__listeners.append(listener)
+				return
+
+		listener(self.reason)
+
+	def remove_listener(self, listener: Callable[[Any], None]) -> None:
+		"""
+		Parameters
+		----------
+		listener : Callable[[Any], None]
+			A function previously passed to add_listener().
+		"""
+
+		with self.__lock:
+			try: self.__listeners.remove(listener)
+			except ValueError: pass
+
+	def clear_timeout(self) -> None:
+		"""
+		Cancel the timer of a signal returned by timeout(), e.g. once the 
+		operation it bounds has completed: the signal then never aborts by 
+		itself, and the timer stops holding it. Does nothing for other signals.
+		"""
+
+		timer, self.__timer = self.__timer, None
+		if timer is not None: timer.cancel()
+
+	def throw_if_aborted(self) -> None:
+		"""
+		Raise the reason of the signal if it is aborted.
+		"""
+
+		if self.aborted:
+			raise self.reason if isinstance(self.reason, BaseException) else AbortError(self.reason)
+
+	@staticmethod
+	def abort(reason: Any = None) -> 'AbortSignal':
+		"""
+		Returns
+		-------
+			An AbortSignal that is already aborted.
+		"""
+
+		controller = AbortController()
+		controller.abort(reason)
+
+		return controller.signal
+
+	@staticmethod
+	def timeout(delay: float) -> 'AbortSignal':
+		"""
+		Parameters
+		----------
+		delay : float
+			The number of seconds before the signal aborts.
+
+		Returns
+		-------
+			An AbortSignal that aborts with a TimeoutError after delay. The
+			wait is a timer, not a sleeping thread.
+		"""
+
+		controller = AbortController()
+
+		# aborting is cheap and runs on the timer thread itself: submitted to
+		# the scheduler, it could wait behind the very work it has to abort
+		timer = _timers.schedule(delay, controller.abort, (TimeoutError(f"The operation timed out after {delay}s"),))
+		controller.signal.__timer = timer
+
+		return controller.signal
+
+	@staticmethod
+	def any(signals: Iterable['AbortSignal|None']) -> 'AbortSignal':
+		"""
+		Parameters
+		----------
+		signals : Iterable[AbortSignal|None]
+			The signals to follow, None entries are ignored.
+
+		Returns
+		-------
+			An AbortSignal that aborts as soon as any of the given signals
+			aborts, with its reason. The given signals only hold a weak
+			reference to it, removed once it aborts or is garbage collected:
+			a long-lived signal does not keep every derived signal alive.
+		"""
+
+		controller = AbortController()
+		dependent = controller.signal
+		reference = weakref.ref(dependent)
+
+		def listener(reason: Any) -> None:
+			signal = reference()
+			if signal is not None: signal._abort(reason)
+
+		sources = [signal for signal in signals if signal is not None]
+		dependent.__sources = [(signal, listener) for signal in sources]
+
+		# the sources are kept by the dependent signal, not the other way round
+		weakref.finalize(dependent, _detach, list(dependent.__sources))
+
+		for signal in sources:
+			signal.add_listener(listener)
+			if dependent.aborted: break
+
+		return dependent
+
+
+def _detach(sources: List[tuple]) -> None:
+	for signal, listener in sources: signal.remove_listener(listener)
+
+
+class AbortController:
+	"""
+	The AbortController interface represents a controller object that allows
+	you to abort one or more operations as and when desired.
+	"""
+
+	def __init__(self):
+		self.signal = AbortSignal()
+
+	def abort(self, reason: Any = None) -> None:
+		"""
+		Parameters
+		----------
+		reason : Any
+			The reason of the abort, an AbortError if None.
+		"""
+
+		if reason is None: reason = AbortError("The operation was aborted")
+
+		self.signal._abort(reason)
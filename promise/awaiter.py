@@ -1,4 +1,4 @@
-from typing import Callable
+from typing import Callable, Iterable, List, Tuple
 
 from promise.promise import Promise
 
@@ -10,7 +10,50 @@ def awaiter(func: Callable[..., Promise]) -> Callable[..., Promise]:
 
 	def wrapper(*args, **kwargs):
 		promise = func(*args, **kwargs)
-		promise.__execution_thread.join()
+
+		# waiting also starts a lazy promise
+		Promise.wait((promise,))
+
 		return promise
 
-	return wrapper
\ No newline at end of file
+	return wrapper
+
+
+def wait_all(promises: Iterable, timeout: float|None = None) -> Tuple[List, List]:
+	"""
+	Block until every promise has settled, or until the timeout.
+
+	Parameters
+	----------
+	promises : Iterable
+		The promises to wait for.
+
+	timeout : float|None
+		The maximum number of seconds to wait. None means no limit.
+
+	Returns
+	-------
+		A (settled, pending) tuple of lists; pending is empty unless the 
+		timeout expired.
+	"""
+	return Promise.wait(promises, timeout=timeout)
+
+
+def wait_any(promises: Iterable, timeout: float|None = None) -> Tuple[List, List]:
+	"""
+	Block until at least one promise has settled, or until the timeout.
+
+	Parameters
+	----------
+	promises : Iterable
+		The promises to wait for.
+
+	timeout : float|None
+		The maximum number of seconds to wait. None means no limit.
+
+	Returns
+	-------
+		A (settled, pending) tuple of lists; settled is empty if the timeout 
+		expired first.
+	"""
+	return Promise.wait(promises, count=1, timeout=timeout)
@@ -0,0 +1,184 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple
+
+from promise.promise import Promise
+
+
+class CacheInfo(NamedTuple):
+	hits: int
+	misses: int
+	stale: int #-> stale values served while revalidating
+	maxsize: int|None
+	currsize: int
+
+
+class _Entry:
+
+	__slots__ = ("promise", "expires", "refreshing")
+
+	def __init__(self, promise: Promise):
+		self.promise = promise
+		self.expires: float|None = None #-> None while in flight, or when there is no ttl
+		self.refreshing = False
+
+
+_KWARGS = object() #-> separates the positional and keyword arguments in keys
+
+
+def memoize_promise(func: Callable[..., Promise]|None = None, *, maxsize: int|None = 128, ttl: float|None = None, key: Callable[..., Hashable]|None = None, stale_while_revalidate: float|None = None):
+	"""
+	A decorator caching the Promises returned by a function: repeated
+	arguments get the same Promise, in flight or settled, and concurrent
+	calls with the same arguments from many threads call the function once.
+
+	Usage:
+
+		@memoize_promise(maxsize=1024, ttl=60, stale_while_revalidate=30)
+		def lookup(name: str) -> Promise: ...
+
+	Parameters
+	----------
+	func : Callable[..., Promise]
+		The function to be memoized, which can also return a plain value.
+
+	maxsize : int|None
+		The maximum number of cached Promises, the least recently used one
+		being evicted first. None for no limit.
+
+	ttl : float|None
+		The number of seconds a fulfilled Promise is served for, from its
+		fulfillment. None to serve it until evicted.
+
+	key : Callable[..., Hashable]|None
+		A function computing the cache key from the arguments; by default
+		the arguments themselves, which must be hashable.
+
+	stale_while_revalidate : float|None
+		The number of seconds, after the ttl, during which the expired
+		Promise is still served while the function is called again in the
+		background; the new Promise replaces it once fulfilled.
+
+	Returns
+	-------
+		The memoized function, with cache_info() returning the counters and
+		cache_clear() emptying the cache. Rejected Promises are evicted as
+		soon as they reject, so the next call tries again.
+	"""
+
+	if func is None:
+		return lambda func: memoize_promise(func, maxsize=maxsize, ttl=ttl, key=key, stale_while_revalidate=stale_while_revalidate)
+
+	lock = threading.Lock()
+	cache: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+	hits = misses = stale = 0
+
+	def make_key(args: tuple, kwargs: dict) -> Hashable:
+		if key is not None: return key(*args, **kwargs)
+		if not kwargs: return args
+		return (*args, _KWARGS, *sorted(kwargs.items()))
+
+	def settled(cache_key: Hashable, entry: _Entry) -> None:
+		# called by the thread settling the Promise: a rejected one is evicted
+		# before any other call can get it
+		with lock:
+			if entry.promise.state == Promise.REJECTED:
+				if cache.get(cache_key) is entry: del cache[cache_key]
+			else:
+				if ttl is not None: entry.expires = time.monotonic() + ttl
+				entry.refreshing = False
+
+	def refresh(cache_key: Hashable, stale_entry: _Entry, args: tuple, kwargs: dict) -> None:
+
+		def replaced(promise: Promise) -> None:
+			with lock:
+				if promise.state == Promise.REJECTED:
+					stale_entry.refreshing = False #-> tried again on the next call
+					return
+
+				if ttl is not None: entry.expires = time.monotonic() + ttl
+				if cache.get(cache_key) is stale_entry: cache[cache_key] = entry
+
+		try:
+			entry = _Entry(Promise.resolve(func(*args, **kwargs)))
+		except Exception:
+			with lock: stale_entry.refreshing = False
+			return
+
+		entry.promise.add_done_callback(replaced)
+
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs) -> Promise:
+		nonlocal hits, misses, stale
+
+		cache_key = make_key(args, kwargs)
+		now = time.monotonic()
+		revalidate = load = False
+
+		with lock:
+			entry = cache.get(cache_key)
+
+			if entry is not None:
+
+				if entry.expires is None or now < entry.expires:
+					cache.move_to_end(cache_key)
+					hits += 1
+					return entry.promise
+
+				if stale_while_revalidate is not None and now < entry.expires + stale_while_revalidate:
+					cache.move_to_end(cache_key)
+					stale += 1
+
+					revalidate = not entry.refreshing
+					entry.refreshing = True
+
+				else:
+					del cache[cache_key]
+					entry = None
+
+			if entry is None:
+				misses += 1
+
+				# the Promise is cached before calling the function, outside of
+				# the lock: concurrent calls wait for the same one
+				promise, resolve, reject = Promise.withResolvers()
+				entry = cache[cache_key] = _Entry(promise)
+				load = True
+
+				if maxsize is not None:
+					while len(cache) > maxsize: cache.popitem(last=False)
+
+		if revalidate: refresh(cache_key, entry, args, kwargs)
+		if not load: return entry.promise
+
+		try:
+			resolve(func(*args, **kwargs)) #-> adopts a returned Promise
+		except Exception as reason:
+			with lock:
+				if cache.get(cache_key) is entry: del cache[cache_key]
+
+			reject(reason)
+			return promise
+
+		promise.add_done_callback(lambda _: settled(cache_key, entry))
+
+		return promise
+
+	def cache_info() -> CacheInfo:
+		with lock:
+			return CacheInfo(hits, misses, stale, maxsize, len(cache))
+
+	def cache_clear() -> None:
+		nonlocal hits, misses, stale
+
+		with lock:
+			cache.clear()
+			hits = misses = stale = 0
+
+	wrapper.cache_info = cache_info
+	wrapper.cache_clear = cache_clear
+
+	return wrapper
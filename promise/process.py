@@ -0,0 +1,267 @@
+import atexit
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, List
+
+from promise.abort import AbortError
+from promise.promise import Promise
+
+#--------------------------------------------------------------------------------
+#--->> Shared memory transfer
+
+class _Shared:
+	"""
+	A bytes-like payload moved through a shared memory block: only the name
+	of the block is pickled, the payload is copied once into the block by
+	the sender and once out of it by the receiver.
+	"""
+
+	__slots__ = ("name", "size", "kind")
+
+	def __init__(self, name: str, size: int, kind: type):
+		self.name = name
+		self.size = size
+		self.kind = kind
+
+	@staticmethod
+	def create(payload: Any) -> 'tuple[_Shared, shared_memory.SharedMemory]':
+		view = memoryview(payload)
+		view = view.cast("B") if view.c_contiguous else memoryview(view.tobytes())
+
+		block = shared_memory.SharedMemory(create=True, size=max(1, view.nbytes))
+		block.buf[:view.nbytes] = view
+
+		kind = bytearray if isinstance(payload, bytearray) else bytes
+
+		return _Shared(block.name, view.nbytes, kind), block
+
+	def load(self, unlink: bool = False) -> Any:
+		block = shared_memory.SharedMemory(name=self.name)
+
+		try:
+			return self.kind(block.buf[:self.size])
+		finally:
+			block.close()
+			if unlink: block.unlink()
+
+
+def _is_large(value: Any, threshold: int|None) -> bool:
+	return threshold is not None and isinstance(value, (bytes, bytearray, memoryview)) and memoryview(value).nbytes >= threshold
+
+def _call(func: Callable, args: tuple, kwargs: dict, threshold: int|None) -> Any:
+	"""
+	Run in the worker process: the shared arguments are read (the parent
+	process owns their blocks) and a large result is returned through a new
+	block, which the parent process unlinks once read.
+	"""
+
+	args = tuple(arg.load() if isinstance(arg, _Shared) else arg for arg in args)
+	kwargs = { name: value.load() if isinstance(value, _Shared) else value for name, value in kwargs.items() }
+
+	result = func(*args, **kwargs)
+
+	if _is_large(result, threshold):
+		shared, block = _Shared.create(result)
+		block.close()
+		return shared
+
+	return result
+
+#--------------------------------------------------------------------------------
+#--->> Process pool
+
+class ProcessPool:
+	"""
+	A pool of worker processes for CPU-bound functions, which threads can
+	not run in parallel because of the GIL. Promise.in_process() runs a
+	function on the default pool and returns a Promise settled with its
+	result, so the pipeline keeps its then() and catch() handlers; those still
+	run on the thread scheduler.
+
+	The function and its arguments are pickled: the function must be
+	defined at the top level of a module. Bytes-like arguments and results
+	of at least shared_memory_threshold bytes go through shared memory
+	instead of the pipe of the pool.
+	"""
+
+	def __init__(self, max_workers: int|None = None, shared_memory_threshold: int|None = 1 << 20, mp_context: multiprocessing.context.BaseContext|None = None):
+		"""
+		Parameters
+		----------
+		max_workers : int|None
+			The number of worker processes, the number of CPUs by default.
+			They are started on first use.
+
+		shared_memory_threshold : int|None
+			The size in bytes from which a bytes, bytearray or memoryview
+			argument or result is moved through shared memory. None to
+			always pickle them.
+
+		mp_context : multiprocessing.context.BaseContext|None
+			The multiprocessing context starting the workers. If None, 
+			"forkserver" where available, else "spawn": never "fork", as 
+			this process runs the scheduler, timer and event loop threads, 
+			whose locks a forked child could inherit held. As with spawn, 
+			the main module is imported by the workers, so a script must 
+			guard its entry point with if __name__ == "__main__".
+		"""
+
+		if mp_context is None:
+			method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+			mp_context = multiprocessing.get_context(method)
+
+		self.max_workers = max_workers or os.cpu_count() or 1
+		self.shared_memory_threshold = shared_memory_threshold
+		self.mp_context = mp_context
+
+		self.__lock = threading.Lock()
+		self.__executor: concurrent.futures.ProcessPoolExecutor|None = None
+
+	def __get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+
+		with self.__lock:
+			if self.__executor is None:
+
+				# the workers must share the resource tracker of this process:
+				# their own would unlink, at exit, the blocks they created
+				if os.name == "posix": resource_tracker.ensure_running()
+
+				self.__executor = concurrent.futures.ProcessPoolExecutor(self.max_workers, mp_context=self.mp_context)
+
+			return self.__executor
+
+	def __share(self, value: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+
+		if not _is_large(value, self.shared_memory_threshold): return value
+
+		shared, block = _Shared.create(value)
+		blocks.append(block)
+
+		return shared
+
+	def run(self, func: Callable, *args, **kwargs) -> Promise:
+		"""
+		Parameters
+		----------
+		func : Callable
+			A picklable function, run in a worker process.
+
+		*args, **kwargs
+			The picklable arguments passed to func.
+
+		Returns
+		-------
+			A Promise fulfilled with the result of func, or rejected with the
+			exception it raised (or with the pickling error). Cancelling the
+			Promise cancels the call if it has not started yet.
+		"""
+
+		blocks = []
+
+		try:
+			args = tuple(self.__share(arg, blocks) for arg in args)
+			kwargs = { name: self.__share(value, blocks) for name, value in kwargs.items() }
+
+			future = self.__get_executor().submit(_call, func, args, kwargs, self.shared_memory_threshold)
+		except Exception as reason:
+			_release(blocks)
+			return Promise.reject(reason)
+
+		promise, resolve, reject = Promise.withResolvers(oncancel=lambda reason: future.cancel())
+
+		def on_done(future: concurrent.futures.Future) -> None:
+			# the blocks are released whatever happens to the Promise
+			_release(blocks)
+
+			if future.cancelled():
+				reject(AbortError("The process pool was shut down"))
+				return
+
+			reason = future.exception()
+			if reason is not None:
+				reject(reason)
+				return
+
+			result = future.result()
+
+			try:
+				resolve(result.load(unlink=True) if isinstance(result, _Shared) else result)
+			except Exception as reason:
+				reject(reason)
+
+		future.add_done_callback(on_done)
+
+		return promise
+
+	def shutdown(self, wait: bool = True) -> None:
+		"""
+		Parameters
+		----------
+		wait : bool
+			If True, block until every submitted call has returned.
+
+		Returns
+		-------
+			Nothing.
+		"""
+
+		with self.__lock:
+			executor = self.__executor
+			self.__executor = None
+
+		if executor is not None: executor.shutdown(wait=wait)
+
+
+def _release(blocks: List[shared_memory.SharedMemory]) -> None:
+	for block in blocks:
+		block.close()
+		block.unlink()
+
+#--------------------------------------------------------------------------------
+#--->> Default process pool
+
+_default_pool: ProcessPool|None = None
+_default_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPool:
+	"""
+	Returns
+	-------
+		The pool used by Promise.in_process(). A shared ProcessPool is
+		created on first use.
+	"""
+
+	global _default_pool
+
+	if _default_pool is None:
+		with _default_lock:
+			if _default_pool is None:
+				_default_pool = ProcessPool()
+
+	return _default_pool
+
+def set_process_pool(pool: ProcessPool|None) -> None:
+	"""
+	Parameters
+	----------
+	pool : ProcessPool|None
+		The pool to be used by Promise.in_process(). None restores the
+		shared ProcessPool.
+
+	Returns
+	-------
+		Nothing.
+	"""
+
+	global _default_pool
+
+	with _default_lock:
+		_default_pool = pool
+
+@atexit.register
+def _shutdown_default_pool() -> None:
+	if _default_pool is not None:
+		_default_pool.shutdown(wait=True)
@@ -1,14 +1,69 @@
 # promise state
-from typing import Any, Callable, Iterable, List
+from typing import Any, Callable, Coroutine, Iterable, Iterator, List, Tuple
+import asyncio
+import concurrent.futures
+import queue
 import threading
+import time
+import traceback
+from collections import deque
+
+from promise import tracing
+from promise.abort import AbortError, AbortSignal
+from promise.scheduler import Scheduler, blocking, get_scheduler
+
+# promise locks are striped: a pending promise only needs its lock for a few 
+# instructions and never holds two of them, so a small shared table replaces 
+# one Lock object per instance
+_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+# reactions settled while a worker is already running reactions are run by 
+# that same worker, in a loop, instead of being submitted to the scheduler
+_trampoline = threading.local()
+
+# marks the reactions of the threads blocked in result() or wait(): they are 
+# called by the thread settling the Promise, never queued, so that waking a 
+# waiter does not need a free worker
+_WAKE = object()
+
+# marks the callbacks of add_done_callback(): called by the settling thread 
+# like the waiters, they are observers rather than subscribers, which does 
+# not keep a Promise from being cancelled when its last subscriber leaves
+_OBSERVE = object()
+
+class _Cancellation:
+	"""
+	What a cancellable Promise owns besides its parent: the function 
+	stopping its work and the AbortSignal it follows.
+	"""
+
+	__slots__ = ("oncancel", "signal", "listener")
+
+	def __init__(self, oncancel: Callable|None, signal: AbortSignal|None = None, listener: Callable|None = None):
+		self.oncancel = oncancel
+		self.signal = signal
+		self.listener = listener
+
+	def cancel(self, reason: Any) -> None:
+		if self.oncancel is not None: self.oncancel(reason)
+
+	def detach(self) -> None:
+		if self.signal is not None: self.signal.remove_listener(self.listener)
 
 class Promise:
 
+	# no per-instance __dict__: a settled Promise is just its state, its value 
+	# and its scheduler
+	__slots__ = ("__state", "__execution_value", "__reactions", "__scheduler", "__canceller", "__weakref__")
+
 	PENDING = 0
 	FULFILLED = 1
 	REJECTED = -1
 
-	def __init__(self, executor: Callable):
+	__ADOPTING = 2 #-> resolved with a Promise, still pending until it settles
+	__LAZY = 3 #-> the executor, kept in __execution_value, has not been queued yet
+
+	def __init__(self, executor: Callable|None = None, scheduler: Scheduler|None = None, lazy: bool = False, signal: AbortSignal|None = None, oncancel: Callable[[Any], None]|None = None):
 		"""
 		The Promise constructor is primarily used to wrap functions that do not already support promises.
 		
@@ -21,6 +76,24 @@ class Promise:
 			rejected, and the return value will be neglected. The semantics 
 			of executor are detailed below.
 
+		scheduler : Scheduler|None
+			The scheduler on which the executor and the handlers attached 
+			with then() are run. Defaults to the global scheduler, see 
+			promise.scheduler.get_scheduler() and set_scheduler().
+
+		lazy : bool
+			If True, the executor is not queued by the constructor but on the 
+			first observation of the Promise: then(), catch(), await, a 
+			combinator or awaiter. An unobserved lazy Promise never runs.
+
+		signal : AbortSignal|None
+			If the signal aborts before the Promise settles, the Promise is 
+			cancelled with the reason of the signal, see cancel().
+
+		oncancel : Callable[[Any], None]|None
+			A function called with the reason when the Promise is cancelled, 
+			to stop the work of the executor (e.g. close a socket).
+
 		Returns
 		-------
 			When called via new, the Promise constructor returns a promise object. 
@@ -32,18 +105,30 @@ class Promise:
 		"""
 		self.__state = self.PENDING
 
-		self.__handleFulfilled = None
-		self.__handleRejected = None
+		# reaction queue: one (handleFulfilled, handleRejected, child) entry per 
+		# subscriber, allocated on first subscription and flushed on settlement
+		self.__reactions = None
 
 		self.__execution_value = None
-		self.__execution_thread = None
 
-		self._rejection_value = None
+		self.__scheduler = scheduler if scheduler is not None else get_scheduler()
+
+		# what cancel() propagates to: the parent Promise, or a _Cancellation
+		self.__canceller = None
+
+		if tracing.tracer is not None: tracing.tracer.on_create(self, None, time.perf_counter_ns())
 
-		if executor:
+		if executor and lazy:
+			self.__state = self.__LAZY
+			self.__execution_value = executor
 
-			self.__execution_thread = threading.Thread(target=self.__resolve_executor, args=(executor,))
-			self.__execution_thread.start()
+		if signal is not None or oncancel is not None:
+			self.__canceller = _Cancellation(oncancel, signal, self.cancel)
+			if signal is not None: signal.add_listener(self.cancel) #-> cancels right away if aborted
+
+		if executor and not lazy and self.__state == self.PENDING:
+			# the executor is queued on the scheduler instead of owning a thread
+			self.__scheduler.submit(self.__resolve_executor, executor)
 
 	#--------------------------------------------------------------------------------
 	#--->> Private methods
@@ -66,12 +151,8 @@ class Promise:
 		# Only the first call to resolutionFunc or rejectionFunc affects the promise's 
 		# state, and subsequent calls to either function can neither change the fulfillment 
 		# value/rejection reason nor toggle the state from "fulfilled" to "rejected" or opposite
-		if self.__state == self.PENDING: self.__state = self.FULFILLED
-
-		self.__execution_value = value
-
-		if self.__handleFulfilled:
-			self.__execution_value = self.__handleFulfilled(self.__execution_value)
+		if isinstance(value, Promise): self.__adopt(value)
+		else: self.__settle(self.FULFILLED, value)
 
 	def __rejectionFunc(self, reason: Any) -> None:
 		"""
@@ -89,20 +170,247 @@ class Promise:
 		# Only the first call to resolutionFunc or rejectionFunc affects the promise's 
 		# state, and subsequent calls to either function can neither change the fulfillment 
 		# value/rejection reason nor toggle the state from "fulfilled" to "rejected" or opposite
-		if self.__state == self.PENDING: self.__state = self.REJECTED
+		self.__settle(self.REJECTED, reason)
 
-		self.__execution_value = reason
+	def __resolve_executor(self, executor: Callable):
+		pending = getattr(_trampoline, "pending", None)
 
-		if self.__handleRejected:
-			self.__execution_value = self.__handleRejected(reason)
+		# the executor opens a trampoline: the first reactions of this promise 
+		# run on the same worker right after it
+		if pending is None:
+			Promise.__run_trampoline(self.__scheduler, Promise.__resolve_executor, self, executor)
+			return
+
+		# cancelled while queued: the work is never started
+		if self.__state != self.PENDING: return
+
+		if tracing.tracer is not None: tracing.tracer.on_executor_start(self, time.perf_counter_ns())
 
-	def __resolve_executor(self, executor: Callable):
 		try:
 			executor(self.__resolutionFunc, self.__rejectionFunc) 
 		except Exception as reason:
-			self.__execution_value = reason
 			self.__rejectionFunc(reason)
 
+	def __adopt(self, other: 'Promise') -> None:
+		"""
+		Follow the state of another Promise, without nesting it: the chain 
+		stays flat however many promises are returned by the handlers.
+		"""
+
+		if other is self:
+			self.__settle(self.REJECTED, TypeError("Chaining cycle detected for promise"))
+			return
+
+		reaction = (
+			lambda value: self.__settle(self.FULFILLED, value, self.__ADOPTING),
+			lambda reason: self.__settle(self.REJECTED, reason, self.__ADOPTING),
+			None
+		)
+
+		with self.__lock:
+			if self.__state != self.PENDING: return
+			self.__state = self.__ADOPTING #-> later calls to resolve/reject are ignored
+
+			# cancelling now releases the adopted Promise; the signal is still 
+			# followed, and detached once settled
+			previous = self.__canceller
+			self.__canceller = _Cancellation(lambda reason: other.__release(reaction, reason))
+
+			if isinstance(previous, _Cancellation):
+				self.__canceller.signal, self.__canceller.listener = previous.signal, previous.listener
+
+		other.__subscribe(reaction)
+
+	@property
+	def __lock(self) -> threading.Lock:
+		return _LOCKS[(id(self) >> 4) & 63]
+
+	def __settle(self, state: int, value: Any, expected: int = PENDING) -> None:
+
+		with self.__lock:
+			if self.__state != expected: return
+
+			self.__state = state
+			self.__execution_value = value
+
+			reactions = self.__reactions
+			self.__reactions = None
+
+			canceller = self.__canceller
+			self.__canceller = None #-> a settled Promise keeps no reference to its parent
+
+		if isinstance(canceller, _Cancellation): canceller.detach()
+
+		if tracing.tracer is not None: tracing.tracer.on_settle(self, state, time.perf_counter_ns())
+
+		if reactions: self.__dispatch(reactions)
+
+	def __subscribe(self, reaction: tuple) -> None:
+		"""
+		Register a (handleFulfilled, handleRejected, child) reaction. If the 
+		Promise is already settled the reaction is queued right away.
+		"""
+
+		executor = None
+
+		with self.__lock:
+
+			# first observation of a lazy Promise: start its executor
+			if self.__state == self.__LAZY:
+				executor = self.__execution_value
+				self.__state = self.PENDING
+				self.__execution_value = None
+
+			if self.__state == self.PENDING or self.__state == self.__ADOPTING:
+				if self.__reactions is None: self.__reactions = [reaction]
+				else: self.__reactions.append(reaction)
+				reaction = None
+
+		if executor: self.__scheduler.submit(self.__resolve_executor, executor)
+
+		if reaction: self.__dispatch((reaction,))
+
+	def __release(self, key: Any, reason: Any) -> None:
+		"""
+		Remove the reaction of a subscriber that is not interested anymore 
+		(a cancelled child, or a combinator which has settled). If it was 
+		the last subscriber, the Promise is cancelled too.
+		"""
+
+		if self.__discard(key): self.cancel(reason)
+
+	def __discard(self, key: Any) -> bool:
+		"""
+		Remove the reaction of a subscriber, without cancelling anything. 
+		Returns True if it was the last subscriber.
+		"""
+
+		with self.__lock:
+			reactions = self.__reactions
+
+			if not reactions: return False
+
+			for index, reaction in enumerate(reactions):
+				if reaction is key or reaction[2] is key:
+					del reactions[index]
+					return all(reaction[2] is _OBSERVE for reaction in reactions)
+
+		return False
+
+	@staticmethod
+	def __release_all(watched: List[tuple], reason: Any) -> None:
+		for promise, reaction in watched: promise.__release(reaction, reason)
+
+	def __dispatch(self, reactions) -> None:
+		"""
+		Queue the reactions of a settled Promise. Inside a trampoline, the 
+		first reaction is the continuation of the chain and is run by the 
+		current worker; the others are submitted so that fan-out still runs 
+		in parallel and a blocking handler can not starve its siblings.
+		"""
+
+		pending = getattr(_trampoline, "pending", None)
+
+		if pending is not None and _trampoline.scheduler is not self.__scheduler: pending = None
+
+		for reaction in reactions:
+			if reaction[2] is _WAKE:
+				reaction[0]()
+			elif reaction[2] is _OBSERVE:
+				try:
+					reaction[0](self)
+				except Exception:
+					traceback.print_exc()
+			elif pending is not None:
+				pending.append((self, reaction))
+				pending = None
+			else:
+				self.__scheduler.submit(Promise.__run_trampoline, self.__scheduler, Promise.__react, self, reaction)
+
+	@staticmethod
+	def __run_trampoline(scheduler: Scheduler, function: Callable, *args) -> None:
+		"""
+		Run a task, then every reaction it settled, iteratively: the stack 
+		depth stays constant whatever the length of the chain.
+		"""
+
+		pending = deque()
+
+		# trampolines can nest when a scheduler runs tasks inline
+		outer = getattr(_trampoline, "pending", None), getattr(_trampoline, "scheduler", None)
+
+		_trampoline.pending = pending
+		_trampoline.scheduler = scheduler
+
+		try:
+			function(*args)
+
+			while pending:
+				promise, reaction = pending.popleft()
+
+				try:
+					promise.__react(reaction)
+				except Exception:
+					traceback.print_exc()
+
+		finally:
+			_trampoline.pending, _trampoline.scheduler = outer
+
+	@staticmethod
+	def __flush_trampoline() -> None:
+		"""
+		Run the reactions queued in the trampoline of the current worker 
+		before it blocks: the promise it waits for may only settle through 
+		one of them.
+		"""
+
+		pending = getattr(_trampoline, "pending", None)
+
+		while pending:
+			promise, reaction = pending.popleft()
+
+			try:
+				promise.__react(reaction)
+			except Exception:
+				traceback.print_exc()
+
+	def __react(self, reaction: tuple) -> None:
+		"""
+		Call the handler of a reaction matching the settled state and settle 
+		its child Promise with the result. Reactions without a child are plain 
+		callbacks whose return value is ignored.
+		"""
+
+		handleFulfilled, handleRejected, child = reaction
+		value = self.__execution_value
+
+		if self.__state == self.FULFILLED:
+			handler = handleFulfilled
+			passthrough = child.__resolutionFunc if child is not None else None
+		else:
+			handler = handleRejected
+			passthrough = child.__rejectionFunc if child is not None else None
+
+		if not handler:
+			if passthrough: passthrough(value)
+			return
+
+		tracer = tracing.tracer
+		if tracer is not None: tracer.on_handler_start(self, child, time.perf_counter_ns())
+
+		try:
+			if child is None:
+				handler(value)
+				return
+
+			try:
+				child.__resolutionFunc(handler(value))
+			except Exception as reason:
+				child.__rejectionFunc(reason)
+
+		finally:
+			if tracer is not None: tracer.on_handler_end(self, child, time.perf_counter_ns())
+
 	#--------------------------------------------------------------------------------
 	#--->> Public methods
 
@@ -134,33 +442,355 @@ class Promise:
 			If handleRejected is not a function, it will be ignored.
 		"""
 
-		# set the handlers
-		self.__handleFulfilled = handleFulfilled # <- call in __resolutionFunc
-		self.__handleRejected = handleRejected # <- call in __rejectionFunc
+		child = Promise.__pending(self.__scheduler)
+		child.__canceller = self #-> cancelling the child releases its subscription
 
-		def executor(resolve, reject):
+		if tracing.tracer is not None: tracing.tracer.on_create(child, self, time.perf_counter_ns())
 
-			# await promise to be resolved
-			if self.__state == self.PENDING:
-				self.__execution_thread.join() # <- wait for the promise to be resolved
-			elif self.__state == self.FULFILLED and self.__handleFulfilled:
-				self.__execution_value = self.__handleFulfilled(self.__execution_value)
-			elif self.__state == self.REJECTED and self.__handleRejected:
-				self.__execution_value = self.__handleRejected(self.__execution_value)
+		# every call adds a subscriber, previous handlers are kept
+		self.__subscribe((handleFulfilled, handleRejected, child))
 
-			if self.__state == self.FULFILLED: resolve(self.__execution_value)
-			elif self.__state == self.REJECTED: resolve(self.__execution_value)
+		return child
 
-		return Promise(executor)
+	def catch(self, handleRejected: Callable):
+		"""
+		Parameters
+		----------
+		handleRejected : Callable
+			A function to be called when the Promise is rejected. 
+			This function has one argument, the rejection reason.
 
-	def catch(self, handleRejected):
-		self.then(None, handleRejected)
+		Returns
+		-------
+			A Promise, the same as then(None, handleRejected).
+		"""
+
+		return self.then(None, handleRejected)
+
+	def cancel(self, reason: Any = None) -> bool:
+		"""
+		Reject a pending Promise with an AbortError and stop the work it 
+		depends on: a queued executor is never started, the oncancel function 
+		is called, and the cancellation goes up the chain to the Promise on 
+		which then() was called (or the one adopted), which is itself 
+		cancelled if it has no other subscriber.
+
+		Parameters
+		----------
+		reason : Any
+			The rejection reason, an AbortError if None.
+
+		Returns
+		-------
+			True if the Promise was pending and is now rejected, False if it 
+			had already settled.
+		"""
+
+		if reason is None: reason = AbortError("The promise was cancelled")
+
+		with self.__lock:
+			state = self.__state
+
+			if state == self.__LAZY:
+				self.__state = state = self.PENDING
+				self.__execution_value = None #-> the executor will never run
+
+			if state != self.PENDING and state != self.__ADOPTING: return False
+
+			canceller = self.__canceller
+			self.__canceller = None
+
+		self.__settle(self.REJECTED, reason, state)
+
+		if isinstance(canceller, Promise): canceller.__release(self, reason)
+		elif canceller is not None:
+			canceller.detach()
+			canceller.cancel(reason)
+
+		return True
+
+	@property
+	def state(self) -> int:
+		"""
+		The state of the Promise: PENDING, FULFILLED or REJECTED. A Promise 
+		resolved with another one, or lazy and not started yet, is PENDING.
+		"""
+
+		state = self.__state
+		return state if state == self.FULFILLED or state == self.REJECTED else self.PENDING
+
+	def add_done_callback(self, callback: Callable[['Promise'], None]) -> None:
+		"""
+		Call a function once the Promise settles, e.g. to release what an 
+		operation holds. Unlike then(), no child Promise is created and the 
+		callback does not count as a subscriber: cancelling the last child 
+		of the Promise still cancels it, see cancel().
+
+		Parameters
+		----------
+		callback : Callable[[Promise], None]
+			A function called with the settled Promise, on the thread 
+			settling it; right away if it is already settled. It must be 
+			quick and must not block.
+
+		Returns
+		-------
+			Nothing.
+		"""
+
+		self.__subscribe((callback, None, _OBSERVE))
+
+	def result(self, timeout: float|None = None) -> Any:
+		"""
+		Block the calling thread until the Promise settles, starting it if 
+		it is lazy. Meant for synchronous code at the edge of the program: 
+		callbacks should use then() instead.
+
+		Parameters
+		----------
+		timeout : float|None
+			The maximum number of seconds to wait. None means no limit.
+
+		Returns
+		-------
+			The fulfillment value. The rejection reason is raised, wrapped in 
+			a PromiseRejection if it is not an exception, and a TimeoutError 
+			is raised if the Promise is still pending after timeout seconds; 
+			it is not cancelled.
+		"""
+
+		Promise.wait((self,), timeout=timeout)
+
+		state = self.__state
+
+		if state == self.FULFILLED: return self.__execution_value
+		if state == self.REJECTED:
+			reason = self.__execution_value
+			raise reason if isinstance(reason, BaseException) else PromiseRejection(reason)
+
+		raise TimeoutError(f"The promise did not settle in {timeout} seconds")
+
+	def exception(self, timeout: float|None = None) -> Any:
+		"""
+		Block the calling thread until the Promise settles, like result().
+
+		Parameters
+		----------
+		timeout : float|None
+			The maximum number of seconds to wait. None means no limit.
+
+		Returns
+		-------
+			The rejection reason, None if the Promise was fulfilled. A 
+			TimeoutError is raised if it is still pending after timeout seconds.
+		"""
+
+		Promise.wait((self,), timeout=timeout)
+
+		state = self.__state
+
+		if state == self.FULFILLED: return None
+		if state == self.REJECTED: return self.__execution_value
+
+		raise TimeoutError(f"The promise did not settle in {timeout} seconds")
+
+	def to_asyncio_future(self, loop: asyncio.AbstractEventLoop|None = None) -> asyncio.Future:
+		"""
+		Parameters
+		----------
+		loop : asyncio.AbstractEventLoop|None
+			The event loop owning the future. Defaults to the running loop.
+
+		Returns
+		-------
+			An asyncio.Future settled like this Promise. The result is handed 
+			to the loop with call_soon_threadsafe, no thread waits for it. 
+			Rejection reasons that are not exceptions are wrapped in a 
+			PromiseRejection.
+		"""
+
+		if loop is None: loop = asyncio.get_running_loop()
+
+		future = loop.create_future()
+
+		def set_result(value: Any) -> None:
+			if not future.done(): future.set_result(value)
+
+		def set_exception(reason: Any) -> None:
+			if not future.done():
+				future.set_exception(reason if isinstance(reason, BaseException) else PromiseRejection(reason))
+
+		self.__subscribe((
+			lambda value: loop.call_soon_threadsafe(set_result, value),
+			lambda reason: loop.call_soon_threadsafe(set_exception, reason),
+			None
+		))
+
+		return future
+
+	def __await__(self):
+		"""
+		Make the Promise awaitable from a coroutine running on an event loop.
+		"""
+		return self.to_asyncio_future().__await__()
 
 	#--------------------------------------------------------------------------------
 	#--->> Static public methods
 
 	@staticmethod
-	def all(iterable: Iterable):
+	def __watch(items: List, on_settle: Callable[[int, int, Any], None], result: 'Promise|None' = None, watched: List[tuple]|None = None) -> List[tuple]:
+		"""
+		The engine of the combinators: call on_settle(index, state, value) 
+		once for every item, as soon as it settles, without blocking. Items 
+		that are not promises are reported right away as fulfilled.
+
+		The (promise, reaction) subscriptions are appended to watched, to be 
+		released once the combinator does not need the remaining items. 
+		Cancelling result releases them too.
+		"""
+
+		if watched is None: watched = []
+
+		if result is not None:
+			result.__canceller = _Cancellation(lambda reason: Promise.__release_all(watched, reason))
+
+		for index, item in enumerate(items):
+
+			if isinstance(item, Promise):
+				reaction = (
+					lambda value, index=index: on_settle(index, Promise.FULFILLED, value),
+					lambda reason, index=index: on_settle(index, Promise.REJECTED, reason),
+					None
+				)
+
+				watched.append((item, reaction))
+				item.__subscribe(reaction)
+			else:
+				on_settle(index, Promise.FULFILLED, item)
+
+		# settled while subscribing: the items subscribed afterwards are not needed
+		if result is not None and (result.__state == Promise.FULFILLED or result.__state == Promise.REJECTED):
+			Promise.__release_all(watched, AbortError("The combinator has already settled"))
+
+		return watched
+
+	@staticmethod
+	def __presettled(state: int, value: Any) -> 'Promise':
+		"""
+		Fast path for an already settled Promise: no executor, no task and 
+		no reaction list are allocated.
+		"""
+
+		promise = Promise.__new__(Promise)
+		promise.__state = state
+		promise.__execution_value = value
+		promise.__reactions = None
+		promise.__scheduler = get_scheduler()
+		promise.__canceller = None
+
+		if tracing.tracer is not None:
+			timestamp = time.perf_counter_ns()
+			tracing.tracer.on_create(promise, None, timestamp)
+			tracing.tracer.on_settle(promise, state, timestamp)
+
+		return promise
+
+	@staticmethod
+	def __pending(scheduler: Scheduler) -> 'Promise':
+		"""
+		Fast path for the pending Promise returned by then(), which 
+		has no executor.
+		"""
+
+		promise = Promise.__new__(Promise)
+		promise.__state = Promise.PENDING
+		promise.__execution_value = None
+		promise.__reactions = None
+		promise.__scheduler = scheduler
+		promise.__canceller = None
+
+		return promise
+
+	@staticmethod
+	def resolve(value: Any = None) -> 'Promise':
+		"""
+		Parameters
+		----------
+		value : Any
+			The value to be resolved by this Promise. Can also be a Promise.
+
+		Returns
+		-------
+			A Promise that is fulfilled with the given value, or the promise 
+			passed as value, if the value was a Promise object.
+		"""
+
+		if isinstance(value, Promise): return value
+
+		return Promise.__presettled(Promise.FULFILLED, value)
+
+	@staticmethod
+	def reject(reason: Any = None) -> 'Promise':
+		"""
+		Parameters
+		----------
+		reason : Any
+			Reason why this Promise rejected.
+
+		Returns
+		-------
+			A Promise that is rejected with the given reason.
+		"""
+
+		return Promise.__presettled(Promise.REJECTED, reason)
+
+	@staticmethod
+	def withResolvers(scheduler: Scheduler|None = None, oncancel: Callable[[Any], None]|None = None) -> tuple:
+		"""
+		Parameters
+		----------
+		scheduler : Scheduler|None
+			The scheduler of the Promise.
+
+		oncancel : Callable[[Any], None]|None
+			A function called with the reason when the Promise is cancelled, 
+			see the Promise constructor.
+
+		Returns
+		-------
+			A (promise, resolve, reject) tuple: a pending Promise without 
+			executor and the two functions settling it, to be called from 
+			anywhere, e.g. from a callback of another library.
+		"""
+
+		promise = Promise.__pending(scheduler if scheduler is not None else get_scheduler())
+		if oncancel is not None: promise.__canceller = _Cancellation(oncancel)
+
+		if tracing.tracer is not None: tracing.tracer.on_create(promise, None, time.perf_counter_ns())
+
+		return promise, promise.__resolutionFunc, promise.__rejectionFunc
+
+	@staticmethod
+	def lazy(executor: Callable, scheduler: Scheduler|None = None) -> 'Promise':
+		"""
+		Parameters
+		----------
+		executor : Callable
+			The same executor as for the Promise constructor.
+
+		scheduler : Scheduler|None
+			The scheduler of the Promise.
+
+		Returns
+		-------
+			A deferred Promise, the same as Promise(executor, scheduler, lazy=True): 
+			the executor is only queued once the Promise is observed.
+		"""
+
+		return Promise(executor, scheduler, lazy=True)
+
+	@staticmethod
+	def all(iterable: Iterable) -> 'Promise':
 		"""
 		The Promise.all() method takes an iterable of promises as an input, and returns a 
 		single Promise that resolves to an array of the results of the input promises. 
@@ -171,8 +801,9 @@ class Promise:
 		
 		Parameters
 		----------
-		iterable : List[Promise]
-            An iterable object such as an Array.
+		iterable : Iterable
+			An iterable object such as a list. Items that are not promises 
+			are treated as already fulfilled values.
 
 		Returns
 		-------
@@ -184,28 +815,420 @@ class Promise:
 			- A pending Promise in all other cases. This returned promise is then 
 			  fulfilled/rejected asynchronously (as soon as the queue is empty) when all 
 			  the promises in the given iterable have fulfilled, or if any of the promises reject. 
-			  See the example about "Asynchronicity or synchronicity of Promise.all" below. 
 			  Returned values will be in order of the Promises passed, regardless of completion order.
 		"""
 
-		resolve_matrix = [] #-> list of resolve functions
-		reject_matrix = [] #-> list of reject functions
-		
-		for item in iterable:
 
-			# ignore if item is not a Promise
-			if isinstance(item, Promise):
-				promise = item #-> Promise
+		items = list(iterable)
+		result = Promise()
 
-				promise.then(
-					lambda value: resolve_matrix.append(value), 
-					lambda reason: reject_matrix.append(reason)
-				)
-			
-			else:
-				resolve_matrix.append(item)
+		if not items:
+			result.__resolutionFunc([])
+			return result
+
+		values = [None] * len(items)
+		remaining = len(items)
+		lock = threading.Lock()
+
+		def on_settle(index: int, state: int, value: Any) -> None:
+			nonlocal remaining
+
+			# short-circuit: the first rejection settles the result and releases 
+			# the other items, the next calls are no-ops
+			if state == Promise.REJECTED:
+				result.__rejectionFunc(value)
+				Promise.__release_all(watched, AbortError("Promise.all() rejected"))
+				return
+
+			values[index] = value
+
+			with lock:
+				remaining -= 1
+				done = remaining == 0
+
+			if done: result.__resolutionFunc(values)
+
+		watched = []
+		Promise.__watch(items, on_settle, result, watched)
+
+		return result
+
+	@staticmethod
+	def allSettled(iterable: Iterable) -> 'Promise':
+		"""
+		The Promise.allSettled() method takes an iterable of promises as input and 
+		returns a single Promise. This returned promise fulfills when all of the 
+		input's promises settle (including when an empty iterable is passed), with 
+		a list of objects that describe the outcome of each promise.
+
+		Parameters
+		----------
+		iterable : Iterable
+			An iterable object such as a list.
+
+		Returns
+		-------
+			A Promise fulfilled with a list of dicts, in input order, either 
+			{"status": "fulfilled", "value": value} or 
+			{"status": "rejected", "reason": reason}. It never rejects.
+		"""
+
+		items = list(iterable)
+		result = Promise()
+
+		if not items:
+			result.__resolutionFunc([])
+			return result
+
+		outcomes = [None] * len(items)
+		remaining = len(items)
+		lock = threading.Lock()
+
+		def on_settle(index: int, state: int, value: Any) -> None:
+			nonlocal remaining
+
+			if state == Promise.FULFILLED: outcomes[index] = {"status": "fulfilled", "value": value}
+			else: outcomes[index] = {"status": "rejected", "reason": value}
+
+			with lock:
+				remaining -= 1
+				done = remaining == 0
+
+			if done: result.__resolutionFunc(outcomes)
+
+		Promise.__watch(items, on_settle, result)
+
+		return result
+
+	@staticmethod
+	def race(iterable: Iterable) -> 'Promise':
+		"""
+		The Promise.race() method takes an iterable of promises as input and 
+		returns a single Promise. This returned promise settles with the eventual 
+		state of the first promise that settles.
+
+		Parameters
+		----------
+		iterable : Iterable
+			An iterable object such as a list.
+
+		Returns
+		-------
+			A Promise that settles like the first item to settle. It stays 
+			pending forever if the iterable is empty. The other items are 
+			then cancelled if nothing else subscribed to them.
+		"""
+
+		result = Promise()
+
+		def on_settle(index: int, state: int, value: Any) -> None:
+			result.__settle(state, value) #-> only the first call has an effect
+
+			# the losers are cancelled, unless someone else is waiting for them
+			Promise.__release_all(watched, AbortError("Promise.race() settled"))
+
+		watched = []
+		Promise.__watch(list(iterable), on_settle, result, watched)
+
+		return result
+
+	@staticmethod
+	def any(iterable: Iterable) -> 'Promise':
+		"""
+		The Promise.any() method takes an iterable of promises as input and 
+		returns a single Promise. This returned promise fulfills when any of the 
+		input's promises fulfills, with this first fulfillment value. It rejects 
+		when all of the input's promises reject (including when an empty iterable 
+		is passed), with an AggregateError containing a list of rejection reasons.
+
+		Parameters
+		----------
+		iterable : Iterable
+			An iterable object such as a list.
+
+		Returns
+		-------
+			A Promise fulfilled with the first fulfillment value, or rejected 
+			with an AggregateError whose errors are in input order.
+		"""
+
+		items = list(iterable)
+		result = Promise()
+
+		if not items:
+			result.__rejectionFunc(AggregateError([], "All promises were rejected"))
+			return result
+
+		reasons = [None] * len(items)
+		remaining = len(items)
+		lock = threading.Lock()
+
+		def on_settle(index: int, state: int, value: Any) -> None:
+			nonlocal remaining
+
+			if state == Promise.FULFILLED:
+				result.__resolutionFunc(value)
+				Promise.__release_all(watched, AbortError("Promise.any() fulfilled"))
+				return
+
+			reasons[index] = value
+
+			with lock:
+				remaining -= 1
+				done = remaining == 0
+
+			if done: result.__rejectionFunc(AggregateError(reasons, "All promises were rejected"))
+
+		watched = []
+		Promise.__watch(items, on_settle, result, watched)
+
+		return result
+
+	@staticmethod
+	def as_completed(iterable: Iterable, timeout: float|None = None) -> Iterator['Promise']:
+		"""
+		Stream the promises of an iterable in the order they settle, so that the 
+		first results can be processed while the others are still running.
+
+		Parameters
+		----------
+		iterable : Iterable
+			An iterable object such as a list. Items that are not promises 
+			are yielded first, as already fulfilled promises.
+
+		timeout : float|None
+			The maximum number of seconds to wait, for the whole iteration. 
+			None means no limit.
+
+		Returns
+		-------
+			An iterator of settled promises. A TimeoutError is raised if 
+			some items are still pending when the timeout expires.
+		"""
+
+		items = list(iterable)
+		settled = queue.SimpleQueue()
+
+		# subscribe right away rather than on the first next()
+		Promise.__watch(items, lambda index, state, value: settled.put((index, state, value)))
+
+		deadline = None if timeout is None else time.monotonic() + timeout
+
+		def iterate() -> Iterator[Promise]:
+
+			for count in range(len(items)):
+
+				wait = None if deadline is None else max(0, deadline - time.monotonic())
+
+				try:
+					with blocking(): index, state, value = settled.get(timeout=wait)
+				except queue.Empty:
+					raise TimeoutError(f"{len(items) - count} (of {len(items)}) promises did not settle in time") from None
+
+				item = items[index]
+				yield item if isinstance(item, Promise) else Promise.__presettled(state, value)
+
+		return iterate()
+
+	@staticmethod
+	def wait(iterable: Iterable, count: int|None = None, timeout: float|None = None) -> Tuple[List, List]:
+		"""
+		Block the calling thread until count items of an iterable have 
+		settled, or until the timeout. Whatever the number of items, the 
+		thread waits on a single Event, set by the thread settling the last 
+		awaited promise; no worker is needed to wake it up. A worker of a 
+		ThreadPoolScheduler waiting here does not count towards its 
+		max_workers, see Scheduler.blocking().
+
+		Parameters
+		----------
+		iterable : Iterable
+			An iterable object such as a list. Items that are not promises 
+			count as settled. Lazy promises are started.
+
+		count : int|None
+			The number of settled items to wait for, all of them if None.
+
+		timeout : float|None
+			The maximum number of seconds to wait. None means no limit.
+
+		Returns
+		-------
+			A (settled, pending) tuple of lists, the items keeping their 
+			order. No TimeoutError is raised: the pending list is not empty 
+			if the timeout expired. Pending promises are not cancelled.
+		"""
+
+		items = list(iterable)
+
+		def settled(item: Any) -> bool:
+			return not isinstance(item, Promise) or item.__state == Promise.FULFILLED or item.__state == Promise.REJECTED
+
+		watched = [item for item in items if not settled(item)]
+		remaining = (len(items) if count is None else min(count, len(items))) - (len(items) - len(watched))
+
+		if remaining > 0:
+
+			# the reactions run by this worker once the current task returns
+			# may be the ones settling the items
+			Promise.__flush_trampoline()
+
+			lock = threading.Lock()
+			event = threading.Event()
+
+			def wake() -> None:
+				nonlocal remaining
+
+				with lock:
+					remaining -= 1
+					if remaining == 0: event.set()
+
+			reaction = (wake, wake, _WAKE)
+
+			for item in watched:
+				item.__subscribe(reaction)
+
+			# a blocked worker is compensated by its pool, which keeps running
+			# the tasks that settle the items
+			with blocking(): event.wait(timeout)
+
+			# the waiters of the items still pending are not needed anymore
+			for item in watched:
+				item.__discard(reaction)
+
+		done, pending = [], []
+		for item in items: (done if settled(item) else pending).append(item)
+
+		return done, pending
+
+	@staticmethod
+	def in_process(func: Callable, *args, **kwargs) -> 'Promise':
+		"""
+		Run a CPU-bound function in a worker process of the default 
+		ProcessPool (see promise.process), out of reach of the GIL.
+
+		Parameters
+		----------
+		func : Callable
+			A picklable function, defined at the top level of a module.
+
+		*args, **kwargs
+			The picklable arguments passed to func. Large bytes-like 
+			arguments go through shared memory.
+
+		Returns
+		-------
+			A Promise fulfilled with the result of func, or rejected with the 
+			exception it raised.
+		"""
+
+		from promise.process import get_process_pool #-> promise.process imports this module
+
+		return get_process_pool().run(func, *args, **kwargs)
+
+	@staticmethod
+	def from_future(future: asyncio.Future|concurrent.futures.Future) -> 'Promise':
+		"""
+		Parameters
+		----------
+		future : asyncio.Future|concurrent.futures.Future
+			The future to be adopted.
+
+		Returns
+		-------
+			A Promise settled from the done callback of the future: fulfilled 
+			with its result, or rejected with its exception. A cancelled future 
+			rejects the Promise with the CancelledError.
+		"""
+
+		promise = Promise(oncancel=lambda reason: future.cancel())
+
+		def on_done(future) -> None:
+			try:
+				promise.__resolutionFunc(future.result())
+			except BaseException as reason:
+				promise.__rejectionFunc(reason)
+
+		future.add_done_callback(on_done)
+
+		return promise
+
+	@staticmethod
+	def from_coroutine(coroutine: Coroutine, loop: asyncio.AbstractEventLoop|None = None) -> 'Promise':
+		"""
+		Parameters
+		----------
+		coroutine : Coroutine
+			The coroutine to be run.
+
+		loop : asyncio.AbstractEventLoop|None
+			The event loop on which the coroutine is run. Defaults to the 
+			loop running in the current thread if any, otherwise to a shared 
+			background loop started on first use.
+
+		Returns
+		-------
+			A Promise settled with the outcome of the coroutine.
+		"""
+
+		if loop is None:
+			try:
+				loop = asyncio.get_running_loop()
+			except RuntimeError:
+				loop = _background_loop()
+
+		try:
+			running = asyncio.get_running_loop()
+		except RuntimeError:
+			running = None
+
+		if loop is running:
+			return Promise.from_future(loop.create_task(coroutine))
+
+		return Promise.from_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+
+class PromiseRejection(Exception):
+	"""
+	Raised when awaiting a Promise rejected with a reason that is not an 
+	exception. The original value is available as reason.
+	"""
+
+	def __init__(self, reason: Any):
+		super().__init__(reason)
+		self.reason = reason
+
+
+class AggregateError(Exception):
+	"""
+	The AggregateError object represents an error when several errors need 
+	to be wrapped in a single error, e.g. by Promise.any().
+	"""
+
+	def __init__(self, errors: Iterable, message: str = ""):
+		super().__init__(message)
+		self.errors = list(errors)
+
+
+_loop: asyncio.AbstractEventLoop|None = None
+_loop_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+	"""
+	Returns
+	-------
+		A shared event loop running forever in a daemon thread, used to run 
+		coroutines when the caller has no loop of its own.
+	"""
+
+	global _loop
+
+	with _loop_lock:
+		if _loop is None:
+			_loop = asyncio.new_event_loop()
+			threading.Thread(target=_loop.run_forever, name="promise-asyncio", daemon=True).start()
 
-		return Promise(lambda resolve, reject: resolve(resolve_matrix) if not reject_matrix else reject(reject_matrix))
+	return _loop
 
 
 if __name__ == '__main__':
@@ -217,10 +1240,10 @@ if __name__ == '__main__':
 	promise2 = Promise(lambda resolve, _: resolve(2))
 	promise3 = 3
 
-	# Promise.all([promise1, promise2, promise3]).then(lambda value: print(value)) #-> [1, 2, 3]
+	Promise.all([promise1, promise2, promise3]).then(lambda value: print(value)) #-> [1, 2, 3]
 
 	promise1 = Promise(lambda resolve, _: resolve(1))
 	promise2 = Promise(lambda _, reject: reject(2))
 	promise3 = 3
 
-	# Promise.all([promise1, promise2, promise3]).catch(lambda value: print(value)) #-> [2]
\ No newline at end of file
+	Promise.all([promise1, promise2, promise3]).catch(lambda value: print(value)) #-> 2
\ No newline at end of file
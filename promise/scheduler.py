@@ -0,0 +1,454 @@
+import atexit
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, ContextManager, List
+
+#--------------------------------------------------------------------------------
+#--->> Timers
+
+class TimerHandle:
+	"""
+	A task scheduled with Scheduler.call_later(), which can be cancelled 
+	until it is due.
+	"""
+
+	__slots__ = ("when", "callback")
+
+	def __init__(self, when: float, task: Callable, args: tuple):
+		self.when = when
+		self.callback = (task, args) #-> a single slot, swapped atomically
+
+	@property
+	def cancelled(self) -> bool:
+		return self.callback is None
+
+	def cancel(self) -> None:
+		self.callback = None #-> release what the task holds right away
+
+
+class _TimerQueue:
+	"""
+	A single daemon thread sleeping until the earliest due timer. It never 
+	runs the tasks itself, it only hands them to their scheduler, so that a 
+	timer costs a heap entry rather than a sleeping thread.
+	"""
+
+	def __init__(self):
+		self.__condition = threading.Condition(threading.Lock())
+		self.__heap = []
+		self.__counter = itertools.count() #-> FIFO order for equal deadlines
+		self.__thread = None
+
+	def __len__(self) -> int:
+		return len(self.__heap)
+
+	def schedule(self, delay: float, task: Callable, args: tuple) -> TimerHandle:
+
+		handle = TimerHandle(time.monotonic() + max(0, delay), task, args)
+
+		with self.__condition:
+			heapq.heappush(self.__heap, (handle.when, next(self.__counter), handle))
+
+			if self.__thread is None:
+				self.__thread = threading.Thread(target=self.__run, name="promise-timers", daemon=True)
+				self.__thread.start()
+
+			# only wake up the thread if the new timer is the earliest one
+			if self.__heap[0][2] is handle: self.__condition.notify()
+
+		return handle
+
+	def __run(self) -> None:
+
+		while True:
+
+			with self.__condition:
+
+				while not self.__heap or self.__heap[0][0] > time.monotonic():
+					timeout = self.__heap[0][0] - time.monotonic() if self.__heap else None
+					self.__condition.wait(timeout)
+
+				_, _, handle = heapq.heappop(self.__heap)
+
+			callback = handle.callback
+			handle = None
+
+			if callback is None: continue
+
+			try:
+				callback[0](*callback[1])
+			except Exception:
+				traceback.print_exc()
+
+			callback = None
+
+_timers = _TimerQueue()
+
+
+class Scheduler:
+	"""
+	Base class of every scheduler. A scheduler decides on which thread
+	the executors and the handlers of a Promise are run.
+
+	Subclasses only need to implement submit(); shutdown() is optional.
+	"""
+
+	def submit(self, task: Callable, *args) -> None:
+		"""
+		Parameters
+		----------
+		task : Callable
+			The function to be run.
+
+		*args
+			The positional arguments passed to task.
+
+		Returns
+		-------
+			Nothing.
+		"""
+		raise NotImplementedError
+
+	def shutdown(self, wait: bool = True) -> None:
+		"""
+		Parameters
+		----------
+		wait : bool
+			If True, block until every submitted task has been run.
+
+		Returns
+		-------
+			Nothing.
+		"""
+
+	def blocking(self) -> ContextManager:
+		"""
+		Returns
+		-------
+			A context manager around code which blocks the current thread 
+			until other tasks of the scheduler have run, e.g. Promise.wait(). 
+			Schedulers with a bounded number of threads use it to keep 
+			running tasks meanwhile.
+		"""
+		return contextlib.nullcontext()
+
+	def call_later(self, delay: float, task: Callable, *args) -> TimerHandle:
+		"""
+		Parameters
+		----------
+		delay : float
+			The number of seconds after which task is submitted.
+
+		task : Callable
+			The function to be run.
+
+		*args
+			The positional arguments passed to task.
+
+		Returns
+		-------
+			A TimerHandle, to cancel the task before it is due. Waiting 
+			does not hold any thread of the scheduler.
+		"""
+		return _timers.schedule(delay, self.submit, (task, *args))
+
+
+class ImmediateScheduler(Scheduler):
+	"""
+	A scheduler that runs every task synchronously on the calling thread.
+	Useful for deterministic tests and for very cheap executors.
+	"""
+
+	def submit(self, task: Callable, *args) -> None:
+		try:
+			task(*args)
+		except Exception:
+			traceback.print_exc()
+
+
+class ThreadPoolScheduler(Scheduler):
+	"""
+	A bounded, work-stealing thread pool.
+
+	Every worker owns a deque of tasks. Tasks submitted from a worker
+	(e.g. the handlers of a promise settled on that worker) are pushed on
+	its own deque and popped LIFO, which keeps related work on the same
+	thread; tasks submitted from any other thread go through a shared
+	injection queue. An idle worker first drains its own deque, then the
+	injection queue and finally steals the oldest task of another worker.
+
+	Workers are started lazily, only when no worker is idle, and never
+	more than max_workers are running tasks: a worker blocked in
+	Promise.wait() (e.g. through result() or awaiter) does not count, and
+	a compensating worker is started if tasks are queued meanwhile, so that
+	the tasks it waits for can not stay queued behind it.
+	"""
+
+	def __init__(self, max_workers: int|None = None, name: str = "promise-worker"):
+		"""
+		Parameters
+		----------
+		max_workers : int|None
+			The maximum number of threads of the pool. Defaults to
+			min(32, os.cpu_count() + 4).
+
+		name : str
+			The prefix of the name of the worker threads.
+		"""
+
+		if max_workers is None:
+			max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+		if max_workers <= 0:
+			raise ValueError("max_workers must be greater than 0")
+
+		self.max_workers = max_workers
+		self.name = name
+
+		lock = threading.Lock()
+		self.__condition = threading.Condition(lock)
+		self.__exited = threading.Condition(lock) #-> notified when a worker exits or blocks
+		self.__injection = deque() #-> tasks submitted from outside the pool
+		self.__queues: List[deque] = [] #-> one deque per worker
+		self.__threads: List[threading.Thread] = []
+		self.__local = threading.local()
+		self.__idle = 0
+		self.__blocked = 0 #-> workers blocked in Promise.wait()
+		self.__alive = 0
+		self.__shutdown = False
+
+	#--------------------------------------------------------------------------------
+	#--->> Private methods
+
+	def __spawn(self) -> None:
+		# must be called with the condition held
+		index = len(self.__threads)
+		self.__queues.append(deque())
+
+		thread = threading.Thread(target=self.__worker, args=(index,), name=f"{self.name}-{index}", daemon=True)
+		self.__threads.append(thread)
+		self.__alive += 1
+		thread.start()
+
+	def __can_spawn(self) -> bool:
+		# must be called with the condition held
+		return len(self.__threads) - self.__blocked < self.max_workers
+
+	def __has_tasks(self) -> bool:
+		return bool(self.__injection) or any(self.__queues)
+
+	def __next_task(self, index: int):
+
+		# 1. own deque, newest first
+		try: return self.__queues[index].pop()
+		except IndexError: pass
+
+		# 2. tasks coming from outside the pool
+		try: return self.__injection.popleft()
+		except IndexError: pass
+
+		# 3. steal the oldest task of another worker
+		queues = self.__queues
+		count = len(queues)
+
+		for offset in range(1, count):
+			try: return queues[(index + offset) % count].popleft()
+			except IndexError: pass
+
+		return None
+
+	def __worker(self, index: int) -> None:
+
+		self.__local.index = index
+		_worker.pool = self
+
+		while True:
+
+			task = self.__next_task(index)
+
+			if task is None:
+				with self.__condition:
+
+					# check again while holding the lock, so that a submit
+					# happening right now can not be missed
+					task = self.__next_task(index)
+
+					if task is None:
+						if self.__shutdown:
+							self.__alive -= 1
+							self.__exited.notify_all()
+							return
+
+						self.__idle += 1
+						self.__condition.wait()
+						self.__idle -= 1
+						continue
+
+			function, args = task
+
+			try:
+				function(*args)
+			except Exception:
+				traceback.print_exc()
+
+			# do not keep the last executor (and its promise) alive while idle
+			task = function = args = None
+
+	#--------------------------------------------------------------------------------
+	#--->> Public methods
+
+	def submit(self, task: Callable, *args) -> None:
+
+		index = getattr(self.__local, "index", None)
+
+		# workers may keep submitting while the pool drains
+		if self.__shutdown and index is None:
+			raise RuntimeError("cannot submit a task after shutdown")
+
+		if index is None: self.__injection.append((task, args))
+		else: self.__queues[index].append((task, args))
+
+		# a worker may still be started while the pool drains, to compensate
+		# for a blocked one
+		with self.__condition:
+			if self.__idle: self.__condition.notify()
+			elif self.__can_spawn(): self.__spawn()
+
+	@contextlib.contextmanager
+	def blocking(self):
+
+		# only the workers of this pool are compensated
+		if getattr(self.__local, "index", None) is None:
+			yield
+			return
+
+		with self.__condition:
+			self.__blocked += 1
+			if not self.__idle and self.__has_tasks() and self.__can_spawn(): self.__spawn()
+			self.__exited.notify_all()
+
+		try:
+			yield
+		finally:
+			with self.__condition:
+				self.__blocked -= 1
+				self.__exited.notify_all()
+
+	def shutdown(self, wait: bool = True, timeout: float|None = None) -> None:
+		"""
+		Parameters
+		----------
+		wait : bool
+			If True, block until every submitted task has been run.
+
+		timeout : float|None
+			The maximum number of seconds to wait once every remaining 
+			worker is blocked in Promise.wait(): they may wait for promises 
+			which never settle. None means no limit.
+
+		Returns
+		-------
+			Nothing.
+		"""
+
+		with self.__condition:
+			self.__shutdown = True
+			self.__condition.notify_all()
+
+			if not wait: return
+
+			caller = 1 if getattr(self.__local, "index", None) is not None else 0
+			deadline = None
+
+			while self.__alive > caller:
+
+				if self.__alive - caller > self.__blocked:
+					deadline = None
+					self.__exited.wait()
+					continue
+
+				# only blocked workers are left
+				if timeout is None:
+					self.__exited.wait()
+					continue
+
+				if deadline is None: deadline = time.monotonic() + timeout
+
+				remaining = deadline - time.monotonic()
+				if remaining <= 0: return
+
+				self.__exited.wait(remaining)
+
+
+_worker = threading.local() #-> the pool of the current worker thread
+
+def blocking() -> ContextManager:
+	"""
+	Returns
+	-------
+		The context manager of Scheduler.blocking() for the scheduler 
+		running the current thread, if it is a worker of a 
+		ThreadPoolScheduler, else a no-op one.
+	"""
+
+	pool = getattr(_worker, "pool", None)
+	return pool.blocking() if pool is not None else contextlib.nullcontext()
+
+#--------------------------------------------------------------------------------
+#--->> Default scheduler
+
+# the seconds given at exit to the workers blocked in Promise.wait()
+_DRAIN_TIMEOUT = 5.0
+
+_default_scheduler: Scheduler|None = None
+_default_lock = threading.Lock()
+
+def get_scheduler() -> Scheduler:
+	"""
+	Returns
+	-------
+		The scheduler used by every Promise created without an explicit
+		scheduler. A shared ThreadPoolScheduler is created on first use.
+	"""
+
+	global _default_scheduler
+
+	if _default_scheduler is None:
+		with _default_lock:
+			if _default_scheduler is None:
+				_default_scheduler = ThreadPoolScheduler()
+
+	return _default_scheduler
+
+def set_scheduler(scheduler: Scheduler|None) -> None:
+	"""
+	Parameters
+	----------
+	scheduler : Scheduler|None
+		The scheduler to be used by every Promise created without an
+		explicit scheduler. None restores the shared ThreadPoolScheduler.
+
+	Returns
+	-------
+		Nothing.
+	"""
+
+	global _default_scheduler
+
+	with _default_lock:
+		_default_scheduler = scheduler
+
+@atexit.register
+def _drain_default_scheduler() -> None:
+	# workers are daemon threads: wait for the pending promises before exiting,
+	# as the interpreter used to do when every promise had its own thread
+	if isinstance(_default_scheduler, ThreadPoolScheduler):
+		_default_scheduler.shutdown(wait=True, timeout=_DRAIN_TIMEOUT)
+	elif _default_scheduler is not None:
+		_default_scheduler.shutdown(wait=True)
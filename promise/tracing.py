@@ -0,0 +1,325 @@
+import json
+import threading
+import weakref
+from typing import Any, Dict, List
+
+#--------------------------------------------------------------------------------
+#--->> Hooks
+
+class Tracer:
+	"""
+	Base class of the lifecycle hooks of Promise. Every hook receives a
+	timestamp in nanoseconds from time.perf_counter_ns(), a monotonic clock.
+	Override the hooks of interest; the default implementations do nothing.
+
+	The hooks are called on the thread where the event happens and must
+	be thread-safe and cheap. No hook is called while no tracer is set.
+	"""
+
+	def on_create(self, promise: Any, parent: Any, timestamp: int) -> None:
+		"""
+		A Promise has been created. parent is the Promise on which then()
+		was called, or None.
+		"""
+
+	def on_executor_start(self, promise: Any, timestamp: int) -> None:
+		"""
+		The executor of a Promise starts running on a worker.
+		"""
+
+	def on_settle(self, promise: Any, state: int, timestamp: int) -> None:
+		"""
+		A Promise has been fulfilled (state 1) or rejected (state -1).
+		"""
+
+	def on_handler_start(self, promise: Any, child: Any, timestamp: int) -> None:
+		"""
+		A handler subscribed to a settled Promise starts running. child is
+		the Promise returned by then(), or None for internal callbacks.
+		"""
+
+	def on_handler_end(self, promise: Any, child: Any, timestamp: int) -> None:
+		"""
+		A handler subscribed to a settled Promise has returned or raised.
+		"""
+
+
+# read by the hot paths of Promise: a single global lookup when disabled
+tracer: Tracer|None = None
+
+def set_tracer(new_tracer: Tracer|None) -> None:
+	"""
+	Parameters
+	----------
+	new_tracer : Tracer|None
+		The tracer receiving the lifecycle events of every Promise,
+		None to disable tracing.
+
+	Returns
+	-------
+		Nothing.
+	"""
+
+	global tracer
+	tracer = new_tracer
+
+def get_tracer() -> Tracer|None:
+	"""
+	Returns
+	-------
+		The current tracer, or None if tracing is disabled.
+	"""
+	return tracer
+
+#--------------------------------------------------------------------------------
+#--->> Built-in collector
+
+class Histogram:
+	"""
+	A histogram of durations, with power of two buckets in microseconds.
+	"""
+
+	def __init__(self):
+		self.count = 0
+		self.total = 0 #-> ns
+		self.min = None
+		self.max = None
+		self.buckets: Dict[int, int] = {} #-> upper bound in us: count
+
+	def add(self, duration: int) -> None:
+		"""
+		Parameters
+		----------
+		duration : int
+			A duration in nanoseconds.
+		"""
+
+		self.count += 1
+		self.total += duration
+
+		if self.min is None or duration < self.min: self.min = duration
+		if self.max is None or duration > self.max: self.max = duration
+
+		bound = 1 << max(0, (duration // 1000).bit_length())
+		self.buckets[bound] = self.buckets.get(bound, 0) + 1
+
+	def percentile(self, fraction: float) -> float|None:
+		"""
+		Returns
+		-------
+			The upper bound, in microseconds, of the bucket holding the given
+			fraction (between 0 and 1) of the samples, or None if empty.
+		"""
+
+		if not self.count: return None
+
+		rank = fraction * self.count
+		seen = 0
+
+		for bound in sorted(self.buckets):
+			seen += self.buckets[bound]
+			if seen >= rank: return float(bound)
+
+		return float(max(self.buckets))
+
+	def snapshot(self) -> dict:
+		"""
+		Returns
+		-------
+			A JSON-serializable summary, all durations in microseconds.
+		"""
+
+		return {
+			"count": self.count,
+			"mean_us": self.total / self.count / 1000 if self.count else None,
+			"min_us": self.min / 1000 if self.min is not None else None,
+			"max_us": self.max / 1000 if self.max is not None else None,
+			"p50_us": self.percentile(0.5),
+			"p99_us": self.percentile(0.99),
+			"buckets_us": { str(bound): count for bound, count in sorted(self.buckets.items()) },
+		}
+
+
+class TraceCollector(Tracer):
+	"""
+	A Tracer recording the promise graph. It reports, as histograms:
+
+		- queue wait: from the creation of a Promise to the start of its executor
+		- execution: from the start of the executor to the settlement
+		- handler: the run time of every handler
+
+	and can dump the graph in the Chrome trace event format, to be opened
+	with chrome://tracing or https://ui.perfetto.dev.
+
+	Usage:
+
+		collector = TraceCollector()
+		set_tracer(collector)
+		...
+		set_tracer(None)
+		collector.dump_chrome_trace("promises.json")
+	"""
+
+	def __init__(self):
+		self.queue_wait = Histogram()
+		self.execution = Histogram()
+		self.handler = Histogram()
+
+		self.__lock = threading.Lock()
+		self.__ids = weakref.WeakKeyDictionary() #-> Promise: record
+		self.__records: List[dict] = []
+		self.__spans: List[dict] = []
+		self.__open_spans: Dict[tuple, dict] = {}
+
+	def __record(self, promise: Any) -> dict|None:
+		try:
+			return self.__ids.get(promise)
+		except TypeError:
+			return None
+
+	#--------------------------------------------------------------------------------
+	#--->> Hooks
+
+	def on_create(self, promise, parent, timestamp):
+		with self.__lock:
+			parent_record = self.__record(parent) if parent is not None else None
+
+			record = {
+				"id": len(self.__records),
+				"parent": parent_record["id"] if parent_record else None,
+				"created": timestamp,
+				"started": None,
+				"settled": None,
+				"state": 0,
+				"thread": None,
+			}
+
+			self.__records.append(record)
+			self.__ids[promise] = record
+
+	def on_executor_start(self, promise, timestamp):
+		with self.__lock:
+			record = self.__record(promise)
+			if record is None: return
+
+			record["started"] = timestamp
+			record["thread"] = threading.get_ident()
+			self.queue_wait.add(timestamp - record["created"])
+
+	def on_settle(self, promise, state, timestamp):
+		with self.__lock:
+			record = self.__record(promise)
+			if record is None: return
+
+			record["settled"] = timestamp
+			record["state"] = state
+
+			if record["thread"] is None: record["thread"] = threading.get_ident()
+			if record["started"] is not None: self.execution.add(timestamp - record["started"])
+
+	def on_handler_start(self, promise, child, timestamp):
+		with self.__lock:
+			record = self.__record(promise)
+			child_record = self.__record(child) if child is not None else None
+
+			self.__open_spans[(id(promise), id(child), threading.get_ident())] = {
+				"promise": record["id"] if record else None,
+				"child": child_record["id"] if child_record else None,
+				"start": timestamp,
+				"end": None,
+				"thread": threading.get_ident(),
+			}
+
+	def on_handler_end(self, promise, child, timestamp):
+		with self.__lock:
+			span = self.__open_spans.pop((id(promise), id(child), threading.get_ident()), None)
+			if span is None: return
+
+			span["end"] = timestamp
+			self.__spans.append(span)
+			self.handler.add(timestamp - span["start"])
+
+	#--------------------------------------------------------------------------------
+	#--->> Reports
+
+	def report(self) -> dict:
+		"""
+		Returns
+		-------
+			The histograms as a JSON-serializable dict.
+		"""
+
+		with self.__lock:
+			return {
+				"promises": len(self.__records),
+				"queue_wait": self.queue_wait.snapshot(),
+				"execution": self.execution.snapshot(),
+				"handler": self.handler.snapshot(),
+			}
+
+	def chrome_trace(self) -> dict:
+		"""
+		Returns
+		-------
+			The promise graph in the Chrome trace event format: one complete
+			event per Promise (from its creation to its settlement), one per
+			handler run, and flow events linking every Promise to its parent.
+		"""
+
+		with self.__lock:
+			records = list(self.__records)
+			spans = list(self.__spans)
+
+		origin = min((record["created"] for record in records), default=0)
+		events = []
+
+		def us(timestamp: int) -> float:
+			return (timestamp - origin) / 1000
+
+		for record in records:
+
+			end = record["settled"] if record["settled"] is not None else record["created"]
+			state = { 1: "fulfilled", -1: "rejected" }.get(record["state"], "pending")
+
+			events.append({
+				"name": f"promise#{record['id']}",
+				"cat": "promise",
+				"ph": "X",
+				"ts": us(record["created"]),
+				"dur": us(end) - us(record["created"]),
+				"pid": 0,
+				"tid": record["thread"] or 0,
+				"args": {"state": state, "parent": record["parent"]},
+			})
+
+			if record["parent"] is not None:
+				parent = records[record["parent"]]
+				flow = {"name": "then", "cat": "link", "id": record["id"], "pid": 0}
+
+				events.append({**flow, "ph": "s", "ts": us(parent["created"]), "tid": parent["thread"] or 0})
+				events.append({**flow, "ph": "f", "bp": "e", "ts": us(record["created"]), "tid": record["thread"] or 0})
+
+		for span in spans:
+			events.append({
+				"name": "handler",
+				"cat": "handler",
+				"ph": "X",
+				"ts": us(span["start"]),
+				"dur": us(span["end"]) - us(span["start"]),
+				"pid": 0,
+				"tid": span["thread"],
+				"args": {"promise": span["promise"], "child": span["child"]},
+			})
+
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+	def dump_chrome_trace(self, path: str) -> None:
+		"""
+		Parameters
+		----------
+		path : str
+			The file where the Chrome trace JSON is written.
+		"""
+
+		with open(path, "w") as file:
+			json.dump(self.chrome_trace(), file)